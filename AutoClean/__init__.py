@@ -1 +1,3 @@
+__version__ = '1.1.3'
+
 from AutoClean.autoclean import AutoClean
\ No newline at end of file
@@ -4,14 +4,21 @@
 
 import os
 import sys
+import pickle
 from timeit import default_timer as timer
 import pandas as pd
 from loguru import logger
 from AutoClean.modules import *
+from AutoClean.columns import ColumnProfile
+from AutoClean.sketches import HashSet, BloomFilter
+from AutoClean.report import RunReport
+from AutoClean.planner import Planner
+from AutoClean.cache import ResultCache
+from AutoClean.partitions import Partitions
 
 class AutoClean:
 
-    def __init__(self, input_data, mode='auto', duplicates=False, missing_num=False, missing_categ=False, encode_categ=False, extract_datetime=False, outliers=False, outlier_param=1.5, logfile=True, verbose=False):  
+    def __init__(self, input_data, mode='auto', duplicates=False, duplicates_subset=None, duplicates_store=False, missing_num=False, missing_categ=False, encode_categ=False, sparse_onehot=False, drop_encoded=False, unseen_label=-2, extract_datetime=False, outliers=False, outlier_param=1.5, outlier_bounds='sequential', quantile_sketch=False, n_neighbors=3, n_jobs=1, partitions=1, sample_size=False, reorder=False, incremental=False, downcast=False, low_memory=False, trace_memory=False, cprofile=False, cache=False, cache_size=1024, logfile=True, verbose=False):  
         '''
         input_data (dataframe)..........Pandas dataframe
         mode (str)......................define in which mode you want to run AutoClean
@@ -22,17 +29,24 @@ class AutoClean:
                                         duplicates are rows where all features are identical
                                         'auto' = automated handling, deletes all copies of duplicates except one
                                         False = skips this step
+        duplicates_subset (list)........define the features on which observations are compared, e.g. ['col1', 'col2']
+                                        None = compares all features
+        duplicates_store (str, float)...define whether the row hashes are kept in a store, so that fitted.transform() also deletes duplicates of all earlier data
+                                        'exact' = exact store, takes 8 bytes per unique observation
+                                        any float between 0 and 1 = Bloom filter with this false-positive rate, takes about 1.44*log2(1/rate) bits per unique observation
+                                        a HashSet or BloomFilter instance = reuses the store of an earlier process, which is updated in place
+                                        False = only deletes duplicates within the data
         missing_num (str)...............define how NUMERICAL missing values are handled
                                         'auto' = automated handling
                                         'linreg' = uses Linear Regression for predicting missing values
-                                        'knn' = uses K-NN algorithm for imputation
+                                        'knn' = uses K-NN algorithm for imputation, the neighbors are searched on all NUMERICAL features
                                         'mean','median' or 'most_frequent' = uses mean/median/mode imputatiom
                                         'delete' = deletes observations with missing values
                                         False = skips this step
         missing_categ (str).............define how CATEGORICAL missing values are handled
                                         'auto' = automated handling
                                         'logreg' = uses Logistic Regression for predicting missing values
-                                        'knn' = uses K-NN algorithm for imputation
+                                        'knn' = uses K-NN algorithm for imputation, the neighbors are searched on all NUMERICAL features
                                         'most_frequent' = uses mode imputatiom
                                         'delete' = deletes observations with missing values
                                         False = skips this step
@@ -42,6 +56,9 @@ class AutoClean:
                                         ['label'] = label-encode all categ. features
                                         to encode only specific features add the column name or index: ['onehot', ['col1', 2]]
                                         False = skips this step
+        sparse_onehot (bool)............define whether ONEHOT encoded features are stored as sparse columns, which saves memory for features with many categories
+        drop_encoded (bool).............define whether the original CATEGORICAL features are deleted after encoding
+        unseen_label (int)..............define the LABEL code of categories that were not seen when fitting, missing values get the code -1
         extract_datetime (str)..........define whether DATETIME type features should be extracted into separate features
                                         to define granularity set to 'D'= day, 'M'= month, 'Y'= year, 'h'= hour, 'm'= minute or 's'= second
                                         False = skips this step
@@ -52,34 +69,132 @@ class AutoClean:
                                         to set a custom multiplier use the 'outlier_param' parameter
                                         False = skips this step
         outlier_param (int, float)......define the multiplier for the outlier bounds
-        logfile (bool)..................define whether to create a logile during the AutoClean process
+        outlier_bounds (str)............define how the bounds are computed when outliers are deleted
+                                        'sequential' = bounds of each feature are computed after deleting the outliers of the previous features
+                                        'original' = bounds of all features are computed on the original data, outliers are deleted in a single pass
+        quantile_sketch (float).........define whether the quartiles for the outlier bounds are approximated with a bounded-memory sketch
+                                        any float between 0 and 1 = targeted rank error of the sketch, e.g. 0.01
+                                        False = computes the exact quartiles
+        n_neighbors (int)...............define the number of neighbors used for K-NN imputation
+        n_jobs (int)....................define the number of parallel workers used to fit the imputation models, one model per feature
+                                        1 = fits the models one after the other, -1 = uses all CPU cores
+        partitions (int)................define the number of row partitions that are processed by parallel worker processes, e.g. 32
+                                        missing values, unique values and row hashes are computed per partition and merged, and K-NN imputation, regression predictions
+                                        and parsing of DATETIME features run per partition, fitted.transform() uses the same number of partitions
+                                        the output is the same as with a single partition, except for bounds from quantile sketches, which are merged
+                                        1 = processes the data in the main process
+        sample_size (int)...............define the maximum number of observations the 'linreg', 'logreg' and 'knn' imputation models are fit on, e.g. 100000
+                                        the observations are sampled at random, stratified by category for CATEGORICAL features
+                                        the quality of a sampled model is estimated on other observations and added to the run report
+                                        False = fits the models on all observations
+        reorder (bool)..................define whether observations are deleted before the missing values are imputed, so that the imputation models are fit on fewer observations
+                                        applies to outliers='delete' and missing_categ='delete' when missing values are imputed with 'auto', 'linreg', 'logreg' or 'knn'
+                                        the models are not fit on the deleted observations, and imputed values are not checked for outliers, so results can differ
+        incremental (bool)..............define whether the fitted cleaner keeps mergeable state, so that fitted.append(df) cleans batches of new observations
+                                        duplicates are deleted against all earlier data, outlier bounds are updated with every batch from quantile sketches,
+                                        and new categories are added to LABEL encodings; outlier bounds are computed as with outlier_bounds='original'
+                                        and with quantile_sketch=0.01, unless another error is set
+        downcast (bool).................define whether the features are converted to the smallest types that keep their values, as last step of the process
+                                        INTs to int8, int16 or int32, FLOATs to float32 if the values rounded to their decimals stay the same,
+                                        and CATEGORICAL features with at most one category per two observations to 'category'
+                                        the memory of the data before and after is added to the run report
+        low_memory (bool)...............define whether the input data is cleaned in place instead of a copy, which lowers the peak memory
+                                        the input data is changed by the process and should not be used afterwards, fitted.transform(df) changes df as well
+                                        only the number of decimals of the original FLOAT features is kept instead of a copy of the input data
+        trace_memory (bool).............define whether the peak memory of every stage is measured with tracemalloc and added to the run report
+                                        tracing the memory slows down the process
+        cprofile (str)..................define a directory where a cProfile dump of every stage is saved, e.g. 'profiles'
+                                        False = skips profiling
+        cache (str).....................define a directory where the cleaned data is cached, e.g. '.autoclean_cache'
+                                        a process with the same input data and parameters returns the cached output and fitted cleaner without cleaning
+                                        False = skips caching
+        cache_size (int)................define the maximum size of the cache in MB, the least recently used results are deleted first
+        logfile (bool, str).............define whether to create a logile during the AutoClean process
                                         logfile will be saved in working directory as "autoclean.log"
+                                        a path can be given instead, e.g. to keep the logs of parallel processes apart
         verbose (bool)..................define whether AutoClean logs will be printed in console
         
         OUTPUT (dataframe)..............a cleaned Pandas dataframe, accessible through the 'output' instance
+        FITTED (FittedCleaner)..........the parameters learned during the process, accessible through the 'fitted' instance
+                                        use fitted.transform(df) to clean new data without refitting, and fitted.save(path) to store it on disk
+        REPORT (RunReport)..............wall time, peak memory, observations and modified cells per stage and feature, accessible through the 'report' instance
         '''
         start = timer()
         self._initialize_logger(verbose, logfile)
+        # the run report is started before the data is copied, so that the copy is part of the traced memory
+        self.report = RunReport(trace_memory, cprofile).start()
         
-        output_data = input_data.copy()
-
         if mode == 'auto':
             duplicates, missing_num, missing_categ, outliers, encode_categ, extract_datetime = 'auto', 'auto', 'auto', 'winz', ['auto'], 's'
+        if incremental is True and quantile_sketch is False:
+            # incremental outlier bounds are computed from mergeable quantile sketches
+            quantile_sketch = 0.01
 
         self.mode = mode
         self.duplicates = duplicates
+        self.duplicates_subset = duplicates_subset
+        self.duplicates_store = duplicates_store
         self.missing_num = missing_num
         self.missing_categ = missing_categ
         self.outliers = outliers
         self.encode_categ = encode_categ
+        self.sparse_onehot = sparse_onehot
+        self.drop_encoded = drop_encoded
+        self.unseen_label = unseen_label
         self.extract_datetime = extract_datetime
         self.outlier_param = outlier_param
+        self.outlier_bounds = outlier_bounds
+        self.quantile_sketch = quantile_sketch
+        self.n_neighbors = n_neighbors
+        self.n_jobs = n_jobs
+        self.partitions = partitions
+        self.sample_size = sample_size
+        self.reorder = reorder
+        self.incremental = incremental
+        self.downcast = downcast
+        self.low_memory = low_memory
+        self.trace_memory = trace_memory
+        self.cprofile = cprofile
+        self.cache = cache
+        self.cache_size = cache_size
         
         # validate the input parameters
-        self._validate_params(output_data, verbose, logfile)
+        self._validate_params(input_data, verbose, logfile)
+
+        # caches the number of decimals of the original FLOAT features
+        self.decimals = dict()
+
+        # collects the parameters learned by the modules during the autoclean process
+        self.fitted = FittedCleaner(dict(mode=self.mode, duplicates=self.duplicates, duplicates_subset=self.duplicates_subset, duplicates_store=self.duplicates_store, 
+                                         missing_num=self.missing_num, missing_categ=self.missing_categ, 
+                                         outliers=self.outliers, encode_categ=self.encode_categ, sparse_onehot=self.sparse_onehot, drop_encoded=self.drop_encoded, 
+                                         unseen_label=self.unseen_label, extract_datetime=self.extract_datetime, outlier_param=self.outlier_param, 
+                                         outlier_bounds=self.outlier_bounds, quantile_sketch=self.quantile_sketch, 
+                                         n_neighbors=self.n_neighbors, n_jobs=self.n_jobs, partitions=self.partitions, sample_size=self.sample_size, reorder=self.reorder, incremental=self.incremental, downcast=self.downcast, 
+                                         low_memory=self.low_memory, trace_memory=self.trace_memory, cprofile=self.cprofile, verbose=verbose))
         
-        # initialize our class and start the autoclean process
-        self.output = self._clean_data(output_data, input_data)  
+        # the cached result of the same input data and parameters is returned without cleaning
+        cache, key, cached = None, None, None
+        if self.cache:
+            cache = ResultCache(self.cache, self.cache_size)
+            if isinstance(self.duplicates_store, (HashSet, BloomFilter)):
+                # a store passed by the user changes with every process
+                logger.warning('Results with a "duplicates_store" instance are not cached')
+            else:
+                key = cache.key(input_data, {k: v for k, v in self.fitted.__dict__.items() if k not in ['steps', 'report']})
+                cached = cache.get(key) if key is not None else None
+                self.report.cache = 'miss' if cached is None else 'hit'
+
+        if cached is not None:
+            self.output, self.fitted = cached
+            logger.info('Loaded cleaned data from cache entry "{}"', key)
+        else:
+            output_data = input_data if low_memory is True else input_data.copy()
+            # initialize our class and start the autoclean process
+            self.output = self._clean_data(output_data, input_data if not self.low_memory else None)  
+            if key is not None:
+                cache.put(key, self.output, self.fitted)
+        self.report.stop()
 
         end = timer()
         logger.info('AutoClean process completed in {} seconds', round(end-start, 6))
@@ -87,17 +202,22 @@ class AutoClean:
         if not verbose:
             print('AutoClean process completed in', round(end-start, 6), 'seconds')
         if logfile:
-            print('Logfile saved to:', os.path.join(os.getcwd(), 'autoclean.log'))
+            print('Logfile saved to:', os.path.abspath(AutoClean._logfile_path(logfile)))
 
     def _initialize_logger(self, verbose, logfile):
         # function for initializing the logging process
         logger.remove()
         if verbose == True:
             logger.add(sys.stderr, format='{time:DD-MM-YYYY HH:mm:ss.SS} - {level} - {message}')
-        if logfile == True:    
-            logger.add('autoclean.log', mode='w', format='{time:DD-MM-YYYY HH:mm:ss.SS} - {level} - {message}')
+        if logfile:    
+            logger.add(AutoClean._logfile_path(logfile), mode='w', format='{time:DD-MM-YYYY HH:mm:ss.SS} - {level} - {message}')
         return
 
+    @staticmethod
+    def _logfile_path(logfile):
+        # function that returns the path of the logfile, "autoclean.log" in the working directory if logfile is True
+        return logfile if isinstance(logfile, str) else 'autoclean.log'
+
     def _validate_params(self, df, verbose, logfile):
         # function for validating the input parameters of the autolean process
         logger.info('Started validation of input parameters...')
@@ -108,9 +228,14 @@ class AutoClean:
             raise ValueError('Invalid value for "mode" parameter.')
         if self.duplicates not in [False, 'auto']:
             raise ValueError('Invalid value for "duplicates" parameter.')
-        if self.missing_num not in [False, 'auto', 'knn', 'mean', 'median', 'most_frequent', 'delete']:
+        if self.duplicates_subset is not None and (not isinstance(self.duplicates_subset, list) or not all(x in df.columns for x in self.duplicates_subset)):
+            raise ValueError('Invalid value for "duplicates_subset" parameter.')
+        if not (self.duplicates_store is False or self.duplicates_store == 'exact' or isinstance(self.duplicates_store, (HashSet, BloomFilter)) 
+                or (isinstance(self.duplicates_store, float) and 0 < self.duplicates_store < 1)):
+            raise ValueError('Invalid value for "duplicates_store" parameter.')
+        if self.missing_num not in [False, 'auto', 'linreg', 'knn', 'mean', 'median', 'most_frequent', 'delete']:
             raise ValueError('Invalid value for "missing_num" parameter.')
-        if self.missing_categ not in [False, 'auto', 'knn', 'most_frequent', 'delete']:
+        if self.missing_categ not in [False, 'auto', 'logreg', 'knn', 'most_frequent', 'delete']:
             raise ValueError('Invalid value for "missing_categ" parameter.')
         if self.outliers not in [False, 'auto', 'winz', 'delete']:
             raise ValueError('Invalid value for "outliers" parameter.')
@@ -125,11 +250,45 @@ class AutoClean:
                 raise ValueError('Invalid value for "encode_categ" parameter.')
         if not isinstance(self.outlier_param, int) and not isinstance(self.outlier_param, float):
             raise ValueError('Invalid value for "outlier_param" parameter.')  
+        if self.outlier_bounds not in ['sequential', 'original']:
+            raise ValueError('Invalid value for "outlier_bounds" parameter.')  
+        if self.quantile_sketch is not False and not (isinstance(self.quantile_sketch, float) and 0 < self.quantile_sketch < 1):
+            raise ValueError('Invalid value for "quantile_sketch" parameter.')  
+        if not isinstance(self.n_neighbors, int) or isinstance(self.n_neighbors, bool) or self.n_neighbors < 1:
+            raise ValueError('Invalid value for "n_neighbors" parameter.')  
+        if not isinstance(self.n_jobs, int) or isinstance(self.n_jobs, bool) or self.n_jobs == 0:
+            raise ValueError('Invalid value for "n_jobs" parameter.')  
+        if not isinstance(self.partitions, int) or isinstance(self.partitions, bool) or self.partitions < 1:
+            raise ValueError('Invalid value for "partitions" parameter.')  
+        if self.sample_size is not False and (not isinstance(self.sample_size, int) or isinstance(self.sample_size, bool) or self.sample_size < 1):
+            raise ValueError('Invalid value for "sample_size" parameter.')  
+        if not isinstance(self.reorder, bool):
+            raise ValueError('Invalid value for "reorder" parameter.')  
+        if not isinstance(self.incremental, bool):
+            raise ValueError('Invalid value for "incremental" parameter.')  
+        if not isinstance(self.downcast, bool):
+            raise ValueError('Invalid value for "downcast" parameter.')  
+        if not isinstance(self.low_memory, bool):
+            raise ValueError('Invalid value for "low_memory" parameter.')  
+        if not isinstance(self.trace_memory, bool):
+            raise ValueError('Invalid value for "trace_memory" parameter.')  
+        if self.cprofile is not False and not isinstance(self.cprofile, str):
+            raise ValueError('Invalid value for "cprofile" parameter.')  
+        if not isinstance(self.sparse_onehot, bool):
+            raise ValueError('Invalid value for "sparse_onehot" parameter.')  
+        if not isinstance(self.drop_encoded, bool):
+            raise ValueError('Invalid value for "drop_encoded" parameter.')  
+        if not isinstance(self.unseen_label, int) or isinstance(self.unseen_label, bool):
+            raise ValueError('Invalid value for "unseen_label" parameter.')  
         if self.extract_datetime not in [False, 'auto', 'D','M','Y','h','m','s']:
             raise ValueError('Invalid value for "extract_datetime" parameter.')  
+        if self.cache is not False and not isinstance(self.cache, str):
+            raise ValueError('Invalid value for "cache" parameter.')  
+        if not isinstance(self.cache_size, (int, float)) or isinstance(self.cache_size, bool) or self.cache_size <= 0:
+            raise ValueError('Invalid value for "cache_size" parameter.')  
         if not isinstance(verbose, bool):
             raise ValueError('Invalid value for "verbose" parameter.')  
-        if not isinstance(logfile, bool):
+        if not isinstance(logfile, (bool, str)):
             raise ValueError('Invalid value for "logfile" parameter.')  
 
         logger.info('Completed validation of input parameters')
@@ -137,11 +296,103 @@ class AutoClean:
             
     def _clean_data(self, df, input_data):
         # function for starting the autoclean process
-        df = df.reset_index(drop=True)
-        df = Duplicates.handle(self, df)
-        df = MissingValues.handle(self, df)
-        df = Outliers.handle(self, df)    
-        df = Adjust.convert_datetime(self, df) 
-        df = EncodeCateg.handle(self, df)     
-        df = Adjust.round_values(self, df, input_data)
+        df = FittedCleaner._reset_index(self, df)
+        # facts about the features are computed once and shared by all modules
+        self.profile = ColumnProfile()
+        if input_data is None:
+            # the input data is cleaned in place, the decimals of the FLOAT features are inferred before they are changed
+            for feature in self.profile.numerical(df):
+                if pd.api.types.is_float_dtype(df[feature]):
+                    self.decimals[feature] = Adjust._decimals(self, df[feature])
+        # with partitions, the facts used by the planner and the modules are computed per partition in parallel
+        Partitions.statistics(self, df)
+        # the planner leaves out the stages that cannot change the data, every stage is recorded in the run report
+        for stage, args in Planner.plan(self, df, input_data):
+            df = self.report.run(stage, self, df, *args)
+        # the learned steps that pass over the same features are fused for transform
+        self.fitted.steps = Planner.fuse(self, self.fitted.steps)
         return df 
+
+
+class FittedCleaner:
+
+    def __init__(self, params):
+        # parameters learned during an AutoClean process, stored as (function, state) steps that are applied in order
+        self.__dict__.update(params)
+        self.steps = []
+        # quantile sketches of the outlier bounds, kept by incremental processes
+        self.sketches = dict()
+        self.report = RunReport()
+
+    def transform(self, df):
+        # function for cleaning new data with the learned parameters, without refitting
+        start = timer()
+        AutoClean._initialize_logger(self, self.verbose, False)
+        if type(df) != pd.core.frame.DataFrame:
+            raise ValueError('Invalid value for "df" parameter.')
+        # every transform gets a new run report, accessible through the 'report' instance
+        self.report = RunReport(self.trace_memory, self.cprofile).start()
+        df = self._transform(self._reset_index(df))
+        self.report.stop()
+        end = timer()
+        logger.info('Completed transform of {} observation(s) in {} seconds', len(df), round(end-start, 6))
+        return df
+
+    def append(self, df):
+        # function for cleaning a batch of new observations, and updating the learned state with it
+        # the cost depends on the size of the batch, not on the size of the earlier data
+        start = timer()
+        AutoClean._initialize_logger(self, self.verbose, False)
+        if type(df) != pd.core.frame.DataFrame:
+            raise ValueError('Invalid value for "df" parameter.')
+        if not self.incremental:
+            raise ValueError('Appending requires an AutoClean process with incremental=True.')
+        self.report = RunReport(self.trace_memory, self.cprofile).start()
+        df = self._transform(self._reset_index(df), update=True)
+        self.report.stop()
+        end = timer()
+        logger.info('Completed append of {} observation(s) in {} seconds', len(df), round(end-start, 6))
+        return df
+
+    def _reset_index(self, df):
+        # function that resets the index, in place if 'low_memory' is set
+        if self.low_memory:
+            df.reset_index(drop=True, inplace=True)
+            return df
+        return df.reset_index(drop=True)
+
+    def _transform(self, df, update=False):
+        # function that applies the learned steps in order, with 'update' the state of each step is updated with the data first
+        self.profile = ColumnProfile()
+        Partitions.statistics(self, df)
+        for i, (apply, state) in enumerate(self.steps):
+            if update:
+                state = self._update_state(apply, df, state)
+                self.steps[i] = (apply, state)
+            # fitted.transform() of incremental processes only checks the store of seen observations, fitted.append() adds to it
+            args = (state, False) if apply is Duplicates._drop and self.incremental and not update else (state,)
+            df = self.report.run(apply, self, df, *args)
+        return df
+
+    def _update_state(self, apply, df, state):
+        # function that returns the state of a step updated with new observations
+        # the store of the duplicates is updated by the step itself, the imputation models and type conversions are kept
+        if apply in [Outliers._clip, Outliers._drop]:
+            return Outliers._update_bounds(self, df, state)
+        if apply is Adjust._clip_cast:
+            return (Outliers._update_bounds(self, df, state[0]), state[1])
+        if apply is EncodeCateg._encode:
+            return EncodeCateg._update_vocabulary(self, df, state)
+        return state
+
+    def save(self, path):
+        # function for saving the fitted cleaner to disk
+        with open(path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return path
+
+    @staticmethod
+    def load(path):
+        # function for loading a fitted cleaner from disk
+        with open(path, 'rb') as f:
+            return pickle.load(f)
@@ -0,0 +1,100 @@
+# AutoClean 2022
+# For detailed documentation and usage guide, please visit the official GitHub Repo.
+# https://github.com/elisemercury/AutoClean
+
+import os
+import glob
+import pickle
+import hashlib
+import pandas as pd
+from loguru import logger
+
+'''
+The result cache stores the output of AutoClean processes on disk, keyed by the content of the input data and the parameters.
+'''
+
+class ResultCache:
+
+    # parameters that do not change the output, and are left out of the key
+    IGNORED = ['n_jobs', 'low_memory', 'trace_memory', 'cprofile', 'verbose']
+
+    def __init__(self, directory, size=1024):
+        # 'directory' holds one Parquet file of cleaned data and one pickled FittedCleaner per entry
+        # 'size' is the maximum size of the cache in MB, the least recently used entries are evicted first
+        self.directory = directory
+        self.size = size
+
+    def key(self, df, params):
+        # function that returns the key of the input data and parameters, or None if they cannot be hashed
+        from AutoClean import __version__
+        try:
+            digest = hashlib.sha256()
+            digest.update(repr((__version__, sorted((k, v) for k, v in params.items() if k not in ResultCache.IGNORED))).encode())
+            digest.update(repr([(str(x), str(df[x].dtype)) for x in df.columns]).encode())
+            # the content is hashed with one vectorized hash per observation, including the index
+            digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+            return digest.hexdigest()
+        except Exception:
+            logger.warning('Input data cannot be hashed, the result is not cached')
+            return None
+
+    def get(self, key):
+        # function that returns the cached (output, fitted) of the key, or None if it is not cached
+        path = os.path.join(self.directory, key)
+        if not os.path.exists(path + '.parquet') or not os.path.exists(path + '.pkl'):
+            return None
+        try:
+            output = pd.read_parquet(path + '.parquet')
+            with open(path + '.pkl', 'rb') as f:
+                fitted = pickle.load(f)
+        except Exception:
+            logger.warning('Cache entry "{}" cannot be read', key)
+            return None
+        # the modification time of an entry is its last use
+        for extension in ['.parquet', '.pkl']:
+            os.utime(path + extension)
+        return output, fitted
+
+    def put(self, key, output, fitted):
+        # function that stores the output and fitted cleaner of the key, and evicts the least recently used entries above the size
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, key)
+        try:
+            # files are written under a temporary name first, so that processes sharing the cache never read a partial entry
+            output.to_parquet(path + '.parquet.tmp', index=False)
+            with open(path + '.pkl.tmp', 'wb') as f:
+                pickle.dump(fitted, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + '.pkl.tmp', path + '.pkl')
+            os.replace(path + '.parquet.tmp', path + '.parquet')
+        except Exception as e:
+            # e.g. sparse or non-string features, which cannot be stored as Parquet
+            logger.warning('Output cannot be cached: {}', e)
+            for extension in ['.parquet.tmp', '.pkl.tmp', '.pkl']:
+                if os.path.exists(path + extension):
+                    os.remove(path + extension)
+            return False
+        ResultCache._evict(self)
+        return True
+
+    def _evict(self):
+        # function that deletes the least recently used entries until the cache fits into its size
+        entries = dict()
+        for file in glob.glob(os.path.join(self.directory, '*.parquet')) + glob.glob(os.path.join(self.directory, '*.pkl')):
+            key = os.path.splitext(os.path.basename(file))[0]
+            try:
+                stat = os.stat(file)
+            except FileNotFoundError:
+                continue
+            size, used = entries.get(key, (0, 0))
+            entries[key] = (size + stat.st_size, max(used, stat.st_mtime))
+        total = sum(size for size, _ in entries.values())
+        for key, (size, _) in sorted(entries.items(), key=lambda x: x[1][1]):
+            if total <= self.size * 2 ** 20:
+                break
+            for extension in ['.parquet', '.pkl']:
+                try:
+                    os.remove(os.path.join(self.directory, key + extension))
+                except FileNotFoundError:
+                    pass
+            total -= size
+            logger.debug('Evicted cache entry "{}"', key)
@@ -0,0 +1,147 @@
+# AutoClean 2022
+# For detailed documentation and usage guide, please visit the official GitHub Repo.
+# https://github.com/elisemercury/AutoClean
+
+import io
+import os
+import sys
+import glob
+import json
+import inspect
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from timeit import default_timer as timer
+import pandas as pd
+
+'''
+Command-line entry point that cleans many CSV or Parquet files with AutoClean, in a pool of worker processes.
+
+    autoclean data/ --missing_num knn --encode_categ '["onehot"]' --workers 8 --summary summary.json
+    autoclean 'extracts/*.csv' --mode auto
+'''
+
+EXTENSIONS = ['.csv', '.parquet']
+
+# parameters of AutoClean that are set by the command itself
+RESERVED = ['input_data', 'logfile', 'verbose']
+
+# BLAS thread limits of a worker process, kept for the lifetime of the worker
+_limits = None
+
+def _parse_value(value):
+    # function that converts a command-line value to the Python value of the parameter, e.g. 'False', '1.5' or '["onehot", ["col1"]]'
+    if value in ['True', 'False', 'None']:
+        return {'True': True, 'False': False, 'None': None}[value]
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+def _input_files(inputs, suffix):
+    # function that expands the directories and globs to the list of input files, the outputs of earlier runs are left out
+    files = []
+    for x in inputs:
+        if os.path.isdir(x):
+            matches = [os.path.join(x, name) for name in sorted(os.listdir(x))]
+        else:
+            matches = sorted(glob.glob(x))
+        for path in matches:
+            stem, extension = os.path.splitext(path)
+            if os.path.isfile(path) and extension.lower() in EXTENSIONS and not stem.endswith(suffix) and path not in files:
+                files.append(path)
+    return files
+
+def _output_path(path, suffix):
+    # function that returns the path of the cleaned file, next to the input file
+    stem, extension = os.path.splitext(path)
+    return stem + suffix + extension
+
+def _init_worker(threads):
+    # function that limits the BLAS threads of a worker, so that the workers together do not use more threads than CPU cores
+    global _limits
+    try:
+        from threadpoolctl import threadpool_limits
+        _limits = threadpool_limits(limits=threads)
+    except ImportError:
+        pass
+
+def _clean_file(path, output_path, params, logfile):
+    # function that cleans a single file, runs in a worker process
+    # each file gets its own logfile, so that the workers do not write to the same "autoclean.log"
+    from AutoClean.autoclean import AutoClean
+    start = timer()
+    result = dict(input=path, output=output_path, logfile=logfile or None, rows_in=None, rows_out=None, columns_out=None, seconds=None, error=None)
+    try:
+        df = pd.read_parquet(path) if path.lower().endswith('.parquet') else pd.read_csv(path)
+        result['rows_in'] = len(df)
+        with contextlib.redirect_stdout(io.StringIO()):
+            output = AutoClean(df, logfile=logfile, verbose=False, **params).output
+        if output_path.lower().endswith('.parquet'):
+            output.to_parquet(output_path, index=False)
+        else:
+            output.to_csv(output_path, index=False)
+        result['rows_out'], result['columns_out'] = output.shape
+    except Exception as e:
+        result['error'] = '{}: {}'.format(type(e).__name__, e)
+    result['seconds'] = timer() - start
+    result['rows_per_second'] = result['rows_in'] / result['seconds'] if result['rows_in'] else None
+    return result
+
+def _parser():
+    # function that builds the argument parser, with one option per parameter of AutoClean
+    from AutoClean.autoclean import AutoClean
+    parser = argparse.ArgumentParser(prog='autoclean', description='Cleans CSV and Parquet files with AutoClean, in parallel worker processes.')
+    parser.add_argument('inputs', nargs='+', help='files, directories or globs of CSV and Parquet (.parquet) files')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of worker processes, one file is cleaned per worker at a time')
+    parser.add_argument('--suffix', default='_clean', help='suffix of the cleaned files, which are written next to the input files')
+    parser.add_argument('--no-logfile', dest='logfile', action='store_false', help='skip the logfile that is written next to each cleaned file')
+    parser.add_argument('--summary', default=None, help='path of a JSON file with the results and throughput of every file')
+    options = parser.add_argument_group('AutoClean parameters', 'same names and values as the parameters of AutoClean, e.g. --missing_num knn --outlier_param 2')
+    for name, param in inspect.signature(AutoClean.__init__).parameters.items():
+        if name != 'self' and name not in RESERVED:
+            options.add_argument('--' + name, type=_parse_value, default=argparse.SUPPRESS, help='default: {!r}'.format(param.default))
+    return parser
+
+def main(argv=None):
+    args = vars(_parser().parse_args(argv))
+    inputs, workers, suffix, logfile, summary = [args.pop(x) for x in ['inputs', 'workers', 'suffix', 'logfile', 'summary']]
+    if not isinstance(workers, int) or workers < 1:
+        raise ValueError('Invalid value for "workers" parameter.')
+    files = _input_files(inputs, suffix)
+    if len(files) == 0:
+        print('No CSV or Parquet files found')
+        return 1
+
+    start = timer()
+    results = []
+    workers = min(workers, len(files))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(max(1, (os.cpu_count() or 1) // workers),)) as pool:
+        futures = []
+        for path in files:
+            output_path = _output_path(path, suffix)
+            futures.append(pool.submit(_clean_file, path, output_path, args, os.path.splitext(output_path)[0] + '.log' if logfile else False))
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result['error'] is None:
+                print('{}  {} -> {} rows  {:.2f} s  {:,.0f} rows/s'.format(result['input'], result['rows_in'], result['rows_out'],
+                                                                         result['seconds'], result['rows_per_second'] or 0), flush=True)
+            else:
+                print('{}  FAILED  {}'.format(result['input'], result['error']), flush=True)
+    seconds = timer() - start
+
+    # summary of the throughput per file and of the whole run
+    failed = [x for x in results if x['error'] is not None]
+    rows = sum(x['rows_in'] for x in results if x['error'] is None)
+    print('Cleaned {} of {} file(s), {} rows in {:.2f} seconds, {:,.0f} rows/s with {} worker(s)'.format(
+          len(results) - len(failed), len(results), rows, seconds, rows / seconds if seconds > 0 else 0, workers))
+    if summary:
+        results.sort(key=lambda x: files.index(x['input']))
+        with open(summary, 'w') as f:
+            json.dump(dict(files=results, seconds=seconds, rows=rows, workers=workers, params=args), f, indent=2, default=str)
+        print('Summary saved to:', os.path.abspath(summary))
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
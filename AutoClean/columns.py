@@ -0,0 +1,114 @@
+# AutoClean 2022
+# For detailed documentation and usage guide, please visit the official GitHub Repo.
+# https://github.com/elisemercury/AutoClean
+
+import numpy as np
+import pandas as pd
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
+'''
+The column profile caches the facts about the features that are used by several modules of the AutoClean pipeline.
+'''
+
+class ColumnProfile:
+
+    def __init__(self):
+        # facts are computed per feature on first use, and dropped when a module changes the feature
+        self._facts = dict()
+
+    def invalidate(self, features=None):
+        # function that drops the facts of the changed features, or of all features if observations were deleted
+        if features is None:
+            self._facts.clear()
+        else:
+            for feature in features:
+                self._facts.pop(feature, None)
+
+    def update(self, feature, **facts):
+        # function that records facts a module already knows, e.g. after converting a feature
+        self._facts.setdefault(feature, dict()).update(facts)
+
+    def dtype(self, df, feature):
+        # dtype class of the feature: 'NUM', 'DATETIME' or 'CATEG'
+        return self._fact(df, feature, 'dtype', ColumnProfile._dtype)
+
+    def numerical(self, df):
+        # NUMERICAL features, in the order of the columns
+        return [x for x in df.columns if self.dtype(df, x) == 'NUM']
+
+    def categorical(self, df):
+        # non NUMERICAL features, in the order of the columns
+        return [x for x in df.columns if self.dtype(df, x) != 'NUM']
+
+    def is_int(self, df, feature):
+        # whether all known values of the feature are integers
+        return self._fact(df, feature, 'is_int', ColumnProfile._is_int)
+
+    def nulls(self, df, feature=None):
+        # number of missing values of the feature, or of all features
+        if feature is None:
+            return sum(self.nulls(df, x) for x in df.columns)
+        return self._fact(df, feature, 'nulls', lambda values: int(values.isna().sum()))
+
+    def nunique(self, df, feature):
+        # number of unique known values of the feature
+        return self._fact(df, feature, 'nunique', lambda values: values.nunique())
+
+    def is_datetime(self, df, feature):
+        # whether the feature is or can be parsed as DATETIME
+        return self.datetime_format(df, feature) is not False
+
+    def datetime_format(self, df, feature):
+        # format of the DATETIME feature inferred from a sample, None if it has no single format, False if it is no DATETIME
+        return self._fact(df, feature, 'datetime_format', ColumnProfile._datetime_format)
+
+    def _fact(self, df, feature, name, compute):
+        # function that returns a cached fact, or computes it from the feature values
+        facts = self._facts.setdefault(feature, dict())
+        if name not in facts:
+            facts[name] = compute(df[feature])
+        return facts[name]
+
+    @staticmethod
+    def _dtype(values):
+        # same selection as select_dtypes(include=np.number), which excludes BOOL features
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            return 'NUM'
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return 'DATETIME'
+        return 'CATEG'
+
+    @staticmethod
+    def _is_int(values):
+        if pd.api.types.is_integer_dtype(values):
+            return True
+        return bool((values.fillna(-9999) % 1  == 0).all())
+
+    @staticmethod
+    def _datetime_format(values, size=100):
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return None
+        # only a sample of values spread over the feature is parsed
+        sample = values.iloc[np.linspace(0, len(values) - 1, min(size, len(values))).astype(int)].dropna()
+        if len(sample) == 0:
+            sample = values.dropna().iloc[:size]
+            if len(sample) == 0:
+                return False
+        if isinstance(sample.iloc[0], str):
+            # exact format of the first value, if all values of the sample follow it
+            for dayfirst in [False, True]:
+                format = guess_datetime_format(sample.iloc[0], dayfirst=dayfirst)
+                if format is not None:
+                    try:
+                        pd.to_datetime(sample, format=format)
+                        return format
+                    except:
+                        pass
+        try:
+            pd.to_datetime(sample)
+            return None
+        except:
+            return False
@@ -5,273 +5,575 @@
 from timeit import default_timer as timer
 import numpy as np
 import pandas as pd
-from math import isnan
-from sklearn import preprocessing
-from sklearn.impute import KNNImputer, SimpleImputer
-from sklearn.linear_model import LinearRegression
-from sklearn.linear_model import LogisticRegression
-from sklearn.pipeline import make_pipeline
-from sklearn.preprocessing import StandardScaler
 from loguru import logger
+from AutoClean.sketches import QuantileSketch, HashSet, BloomFilter
+from AutoClean.partitions import Partitions
 import warnings
 warnings.filterwarnings('ignore')
 
 '''
 Modules are used by the AutoClean pipeline for data cleaning and preprocessing.
+
+scikit-learn and joblib are imported by the functions that use them, so that importing AutoClean stays fast
+and runs that do not impute missing values never load them.
 '''
 
+# frames with fewer rows and no store of seen hashes are deduplicated by pandas, which is faster than hashing the rows up to about a million rows
+_DEDUP_ROWS = 1000000
+
 class MissingValues:
 
-    def handle(self, df, _n_neighbors=3):
+    def handle(self, df):
         # function for handling missing values in the data
         if self.missing_num or self.missing_categ:
             logger.info('Started handling of missing values...', str(self.missing_num).upper())
             start = timer()
-            self.count_missing = df.isna().sum().sum()
+            self.count_missing = self.profile.nulls(df)
 
             if self.count_missing != 0:
                 logger.info('Found a total of {} missing value(s)', self.count_missing)
-                df = df.dropna(how='all')
-                df.reset_index(drop=True)
-                
-                if self.missing_num: # numeric data
-                    logger.info('Started handling of NUMERICAL missing values... Method: "{}"', str(self.missing_num).upper())
-                    # automated handling
-                    if self.missing_num == 'auto': 
-                        self.missing_num = 'linreg'
-                        lr = LinearRegression()
-                        df = MissingValues._lin_regression_impute(self, df, lr)
-                        self.missing_num = 'knn'
-                        imputer = KNNImputer(n_neighbors=_n_neighbors)
-                        df = MissingValues._impute(self, df, imputer, type='num')
-                    # linear regression imputation
-                    elif self.missing_num == 'linreg':
-                        lr = LinearRegression()
-                        df = MissingValues._lin_regression_impute(self, df, lr)
-                    # knn imputation
-                    elif self.missing_num == 'knn':
-                        imputer = KNNImputer(n_neighbors=_n_neighbors)
-                        df = MissingValues._impute(self, df, imputer, type='num')
-                    # mean, median or mode imputation
-                    elif self.missing_num in ['mean', 'median', 'most_frequent']:
-                        imputer = SimpleImputer(strategy=self.missing_num)
-                        df = MissingValues._impute(self, df, imputer, type='num')
-                    # delete missing values
-                    elif self.missing_num == 'delete':
-                        df = MissingValues._delete(self, df, type='num')
-                        logger.debug('Deletion of {} NUMERIC missing value(s) succeeded', self.count_missing-df.isna().sum().sum())      
-
-                if self.missing_categ: # categorical data
-                    logger.info('Started handling of CATEGORICAL missing values... Method: "{}"', str(self.missing_categ).upper())
-                    # automated handling
-                    if self.missing_categ == 'auto':
-                        self.missing_categ = 'logreg'
-                        lr = LogisticRegression()
-                        df = MissingValues._log_regression_impute(self, df, lr)
-                        self.missing_categ = 'knn'
-                        imputer = KNNImputer(n_neighbors=_n_neighbors)
-                        df = MissingValues._impute(self, df, imputer, type='categ')
-                    elif self.missing_categ == 'logreg':
-                        lr = LogisticRegression()
-                        df = MissingValues._log_regression_impute(self, df, lr)
-                    # knn imputation
-                    elif self.missing_categ == 'knn':
-                        imputer = KNNImputer(n_neighbors=_n_neighbors)
-                        df = MissingValues._impute(self, df, imputer, type='categ')  
-                    # mode imputation
-                    elif self.missing_categ == 'most_frequent':
-                        imputer = SimpleImputer(strategy=self.missing_categ)
-                        df = MissingValues._impute(self, df, imputer, type='categ')
-                    # delete missing values                    
-                    elif self.missing_categ == 'delete':
-                        df = MissingValues._delete(self, df, type='categ')
-                        logger.debug('Deletion of {} CATEGORICAL missing value(s) succeeded', self.count_missing-df.isna().sum().sum())
             else:
+                # the imputers are fit all the same, so that missing values in new data are handled by transform
                 logger.debug('{} missing values found', self.count_missing)
+            self.fitted.steps.append((MissingValues._drop_empty, None))
+            df = MissingValues._drop_empty(self, df, None)
+
+            # with 'reorder', observations with CATEGORICAL missing values are deleted before the NUMERICAL imputation models are fit
+            if self.reorder and self.missing_categ == 'delete' and self.missing_num in ['auto', 'linreg', 'knn']:
+                df = MissingValues._handle_categ(self, df)
+                df = MissingValues._handle_num(self, df)
+            else:
+                df = MissingValues._handle_num(self, df)
+                df = MissingValues._handle_categ(self, df)
             end = timer()
             logger.info('Completed handling of missing values in {} seconds', round(end-start, 6))  
         else:
             logger.info('Skipped handling of missing values')
         return df
 
-    def _impute(self, df, imputer, type):
+    def _handle_num(self, df):
+        # function for handling NUMERICAL missing values
+        if self.missing_num: # numeric data
+            logger.info('Started handling of NUMERICAL missing values... Method: "{}"', str(self.missing_num).upper())
+            from sklearn.impute import SimpleImputer
+            # the models are only fit for the features with missing values, the other features are imputed with their mean
+            complete = MissingValues._complete(self, df, type='num')
+            # automated handling
+            if self.missing_num == 'auto': 
+                from sklearn.linear_model import LinearRegression
+                self.missing_num = 'linreg'
+                lr = LinearRegression()
+                df = MissingValues._lin_regression_impute(self, df, lr)
+                self.missing_num = 'knn'
+                df = MissingValues._knn_impute(self, df, type='num')
+            # linear regression imputation
+            elif self.missing_num == 'linreg':
+                from sklearn.linear_model import LinearRegression
+                lr = LinearRegression()
+                df = MissingValues._lin_regression_impute(self, df, lr)
+            # knn imputation
+            elif self.missing_num == 'knn':
+                df = MissingValues._knn_impute(self, df, type='num')
+            # mean, median or mode imputation
+            elif self.missing_num in ['mean', 'median', 'most_frequent']:
+                imputer = SimpleImputer(strategy=self.missing_num)
+                df = MissingValues._impute(self, df, imputer, type='num')
+            # delete missing values
+            elif self.missing_num == 'delete':
+                self.fitted.steps.append((MissingValues._delete, 'num'))
+                df = MissingValues._delete(self, df, type='num')
+                logger.debug('Deletion of {} NUMERIC missing value(s) succeeded', self.count_missing-self.profile.nulls(df))
+            if self.missing_num in ['linreg', 'knn']:
+                df = MissingValues._impute(self, df, SimpleImputer(strategy='mean'), type='num', features=complete)
+        return df
+
+    def _handle_categ(self, df):
+        # function for handling CATEGORICAL missing values
+        if self.missing_categ: # categorical data
+            logger.info('Started handling of CATEGORICAL missing values... Method: "{}"', str(self.missing_categ).upper())
+            from sklearn.impute import SimpleImputer
+            # the models are only fit for the features with missing values, the other features are imputed with their mode
+            complete = MissingValues._complete(self, df, type='categ')
+            # automated handling
+            if self.missing_categ == 'auto':
+                from sklearn.linear_model import LogisticRegression
+                self.missing_categ = 'logreg'
+                lr = LogisticRegression()
+                df = MissingValues._log_regression_impute(self, df, lr)
+                self.missing_categ = 'knn'
+                df = MissingValues._knn_impute(self, df, type='categ')
+            elif self.missing_categ == 'logreg':
+                from sklearn.linear_model import LogisticRegression
+                lr = LogisticRegression()
+                df = MissingValues._log_regression_impute(self, df, lr)
+            # knn imputation
+            elif self.missing_categ == 'knn':
+                df = MissingValues._knn_impute(self, df, type='categ')  
+            # mode imputation
+            elif self.missing_categ == 'most_frequent':
+                imputer = SimpleImputer(strategy=self.missing_categ)
+                df = MissingValues._impute(self, df, imputer, type='categ')
+            # delete missing values                    
+            elif self.missing_categ == 'delete':
+                self.fitted.steps.append((MissingValues._delete, 'categ'))
+                df = MissingValues._delete(self, df, type='categ')
+                logger.debug('Deletion of {} CATEGORICAL missing value(s) succeeded', self.count_missing-self.profile.nulls(df))
+            if self.missing_categ in ['logreg', 'knn']:
+                df = MissingValues._impute(self, df, SimpleImputer(strategy='most_frequent'), type='categ', features=complete)
+        return df
+
+    def _complete(self, df, type):
+        # function that returns the NUMERICAL or CATEGORICAL features without missing values
+        cols_num = self.profile.numerical(df)
+        return [x for x in df.columns if (x in cols_num) == (type == 'num') and self.profile.nulls(df, x) == 0]
+
+    def _impute(self, df, imputer, type, features=None):
         # function for imputing missing values in the data
-        cols_num = df.select_dtypes(include=np.number).columns 
+        # an imputer is fit for every NUMERICAL or CATEGORICAL feature, or for the given features, also if it has no missing values,
+        # so that missing values in new data are imputed as well
+        from sklearn.base import clone
+        cols_num = self.profile.numerical(df)
+        if features is None:
+            features = [x for x in df.columns if (x in cols_num) == (type == 'num')]
+        if len(features) == 0:
+            return df
+        method = imputer.strategy.upper()
+        imputers = dict()
+        counts = dict()
+        if imputer.strategy == 'most_frequent' and Partitions.is_partitioned(self, df):
+            # the modes are found from the value counts of the partitions, which are counted in parallel
+            counts = Partitions.value_counts(self, df, features)
 
         if type == 'num':
             # numerical features
-            for feature in df.columns: 
-                if feature in cols_num:
-                    if df[feature].isna().sum().sum() != 0:
-                        try:
-                            df_imputed = pd.DataFrame(imputer.fit_transform(np.array(df[feature]).reshape(-1, 1)))
-                            counter = df[feature].isna().sum().sum() - df_imputed.isna().sum().sum()
-
-                            if (df[feature].fillna(-9999) % 1  == 0).all():
-                                df[feature] = df_imputed
-                                # round back to INTs, if original data were INTs
-                                df[feature] = df[feature].round()
-                                df[feature] = df[feature].astype('Int64')                                        
-                            else:
-                                df[feature] = df_imputed
-                            if counter != 0:
-                                logger.debug('{} imputation of {} value(s) succeeded for feature "{}"', str(self.missing_num).upper(), counter, feature)
-                        except:
-                            logger.warning('{} imputation failed for feature "{}"', str(self.missing_num).upper(), feature)
+            for feature in features:
+                try:
+                    # fit a separate imputer per feature, so that it can be reused on new data
+                    if feature in counts:
+                        # ties go to the smallest value, as with the imputer
+                        values = counts[feature]
+                        values = np.array([values[values == values.max()].index.min() if len(values) != 0 else np.nan], dtype=float)
+                    else:
+                        values = df[feature].to_numpy(dtype=float, na_value=np.nan)
+                    imputers[feature] = (None, clone(imputer).fit(values.reshape(-1, 1)))
+                except:
+                    logger.warning('{} imputation failed for feature "{}"', method, feature)
         else:
             # categorical features
-            for feature in df.columns:
-                if feature not in cols_num:
-                    if df[feature].isna().sum()!= 0:
-                        try:
-                            mapping = dict()
-                            mappings = {k: i for i, k in enumerate(df[feature].dropna().unique(), 0)}
-                            mapping[feature] = mappings
-                            df[feature] = df[feature].map(mapping[feature])
-
-                            df_imputed = pd.DataFrame(imputer.fit_transform(np.array(df[feature]).reshape(-1, 1)), columns=[feature])    
-                            counter = sum(1 for i, j in zip(list(df_imputed[feature]), list(df[feature])) if i != j)
-
-                            # round to integers before mapping back to original values
-                            df[feature] = df_imputed
-                            df[feature] = df[feature].round()
-                            df[feature] = df[feature].astype('Int64')  
-
-                            # map values back to original
-                            mappings_inv = {v: k for k, v in mapping[feature].items()}
-                            df[feature] = df[feature].map(mappings_inv)
-                            if counter != 0:
-                                logger.debug('{} imputation of {} value(s) succeeded for feature "{}"', self.missing_categ.upper(), counter, feature)
-                        except:
-                            logger.warning('{} imputation failed for feature "{}"', str(self.missing_categ).upper(), feature)
+            for feature in features:
+                try:
+                    # impute label codes of the categorical feature values
+                    if feature in counts:
+                        # the codes follow the order in which the values first appear, ties go to the smallest code
+                        mapping = {k: i for i, k in enumerate(counts[feature].index, 0)}
+                        values = counts[feature].to_numpy()
+                        values = np.array([np.argmax(values) if len(values) != 0 else np.nan], dtype=float)
+                    else:
+                        mapping = {k: i for i, k in enumerate(df[feature].dropna().unique(), 0)}
+                        values = df[feature].map(mapping).to_numpy(dtype=float, na_value=np.nan)
+                    imputers[feature] = (mapping, clone(imputer).fit(values.reshape(-1, 1)))
+                except:
+                    logger.warning('{} imputation failed for feature "{}"', method, feature)
+        state = (method, imputers)
+        self.fitted.steps.append((MissingValues._fill, state))
+        return MissingValues._fill(self, df, state)
+
+    def _fill(self, df, state):
+        # function that imputes missing values with the fitted imputers
+        method, imputers = state
+        for feature, (mapping, imputer) in imputers.items():
+            start = timer()
+            try:
+                missing = df[feature].isna()
+                counter = int(missing.sum())
+                if counter == 0:
+                    continue
+                if mapping is None:
+                    # numerical feature
+                    values = df[feature].to_numpy(dtype=float, na_value=np.nan)
+                    imputed = pd.Series(imputer.transform(values.reshape(-1, 1)).ravel(), index=df.index)
+                    if self.profile.is_int(df, feature):
+                        # round back to INTs, if original data were INTs
+                        df[feature] = imputed.round().astype('Int64')
+                    else:
+                        df[feature] = imputed
+                else:
+                    # categorical feature, round to integers before mapping back to original values
+                    values = df[feature].map(mapping).to_numpy(dtype=float, na_value=np.nan)
+                    imputed = pd.Series(imputer.transform(values.reshape(-1, 1)).ravel(), index=df.index).round()
+                    mappings_inv = {v: k for k, v in mapping.items()}
+                    df.loc[missing, feature] = imputed[missing].map(mappings_inv)
+                self.profile.invalidate([feature])
+                self.report.feature(feature, timer() - start, counter)
+                logger.debug('{} imputation of {} value(s) succeeded for feature "{}"', method, counter, feature)
+            except:
+                logger.warning('{} imputation failed for feature "{}"', method, feature)
         return df
 
-    def _lin_regression_impute(self, df, model):
-        # function for predicting missing values with linear regression
-        cols_num = df.select_dtypes(include=np.number).columns
-        mapping = dict()
+    def _knn_impute(self, df, type):
+        # function for imputing missing values with K-NN, using all NUMERICAL features as the neighbor space
+        cols_num = self.profile.numerical(df)
+        targets = dict()
         for feature in df.columns:
-            if feature not in cols_num:
-                # create label mapping for categorical feature values
-                mappings = {k: i for i, k in enumerate(df[feature])}
-                mapping[feature] = mappings
-                df[feature] = df[feature].map(mapping[feature])
-        for feature in cols_num: 
-                try:
-                    test_df = df[df[feature].isnull()==True].dropna(subset=[x for x in df.columns if x != feature])
-                    train_df = df[df[feature].isnull()==False].dropna(subset=[x for x in df.columns if x != feature])
-                    if len(test_df.index) != 0:
-                        pipe = make_pipeline(StandardScaler(), model)
-
-                        y = np.log(train_df[feature]) # log-transform the data
-                        X_train = train_df.drop(feature, axis=1)
-                        test_df.drop(feature, axis=1, inplace=True)
-                        
-                        try:
-                            model = pipe.fit(X_train, y)
-                        except:
-                            y = train_df[feature] # use non-log-transformed data
-                            model = pipe.fit(X_train, y)
-                        if (y == train_df[feature]).all():
-                            pred = model.predict(test_df)
-                        else:
-                            pred = np.exp(model.predict(test_df)) # predict values
-
-                        test_df[feature]= pred
-
-                        if (df[feature].fillna(-9999) % 1  == 0).all():
-                            # round back to INTs, if original data were INTs
-                            test_df[feature] = test_df[feature].round()
-                            test_df[feature] = test_df[feature].astype('Int64')
-                            df[feature].update(test_df[feature])                          
-                        else:
-                            df[feature].update(test_df[feature])  
-                        logger.debug('LINREG imputation of {} value(s) succeeded for feature "{}"', len(pred), feature)
-                except:
-                    logger.warning('LINREG imputation failed for feature "{}"', feature)
-        for feature in df.columns: 
-            try:   
-                # map categorical feature values back to original
-                mappings_inv = {v: k for k, v in mapping[feature].items()}
-                df[feature] = df[feature].map(mappings_inv)
+            if (feature in cols_num) == (type == 'num') and self.profile.nulls(df, feature) != 0:
+                if type == 'num':
+                    targets[feature] = None
+                else:
+                    # impute label codes of the categorical feature values
+                    targets[feature] = {k: i for i, k in enumerate(df[feature].dropna().unique(), 0)}
+        if len(targets) == 0:
+            return df
+        X = df[cols_num].to_numpy(dtype=float, na_value=np.nan)
+        Y = np.empty((len(df), len(targets)))
+        fallback = np.full(len(targets), np.nan)
+        for i, (feature, mapping) in enumerate(targets.items()):
+            Y[:, i] = (df[feature] if mapping is None else df[feature].map(mapping)).to_numpy(dtype=float, na_value=np.nan)
+            # fallback for observations without any known neighbor feature: mean or mode of the feature
+            known = Y[~np.isnan(Y[:, i]), i]
+            if len(known) != 0:
+                fallback[i] = known.mean() if mapping is None else np.bincount(known.astype(int)).argmax()
+        # donors are the observations where the neighbor space and all imputed features are known
+        donors = ~np.isnan(X).any(axis=1) & ~np.isnan(Y).any(axis=1)
+        center, scale = X[donors].mean(axis=0), X[donors].std(axis=0)
+        scale[~(scale > 0)] = 1
+        donors_X, donors_Y = (X[donors] - center) / scale, Y[donors]
+        # CATEGORICAL donors are stratified by their combination of categories
+        strata = None if type == 'num' else np.unique(donors_Y, axis=0, return_inverse=True)[1].ravel()
+        sample, holdout = MissingValues._sample(self, len(donors_X), strata)
+        if sample is not None:
+            # the quality of the imputation is estimated on the donors that were not in the sample, without the imputed feature as neighbor feature
+            for i, feature in enumerate(targets):
+                known = np.array([x != feature for x in cols_num])
+                values = MissingValues._knn_search(self, donors_X[np.ix_(sample, known)], donors_Y[sample][:, [i]], donors_X[np.ix_(holdout, known)],
+                                                   self.n_neighbors, type)
+                quality = MissingValues._quality(self, donors_Y[holdout, i], values[:, 0], type == 'categ')
+                self.report.feature(feature, sample_size=len(sample), quality=quality)
+                logger.debug('KNN donors sampled {} of {} observation(s) for feature "{}", quality estimate {}', len(sample), len(donors_X), feature, quality)
+            donors_X, donors_Y = donors_X[sample], donors_Y[sample]
+        state = (type, self.n_neighbors, cols_num, targets, (center, scale), (donors_X, donors_Y), fallback)
+        self.fitted.steps.append((MissingValues._knn_fill, state))
+        return MissingValues._knn_fill(self, df, state)
+
+    def _knn_fill(self, df, state):
+        # function that imputes missing values with the mean (NUMERICAL) or mode (CATEGORICAL) of the K nearest donors
+        type, n_neighbors, cols_num, targets, (center, scale), (donors_X, donors_Y), fallback = state
+        features = list(targets)
+        X = (df[cols_num].to_numpy(dtype=float, na_value=np.nan) - center) / scale
+        missing = df[features].isna().to_numpy()
+        rows = np.flatnonzero(missing.any(axis=1))
+        imputed = np.full(missing.shape, np.nan)
+        if len(rows) != 0:
+            # one neighbor search per missingness pattern, on the features that are known in that pattern
+            patterns, inverse = np.unique(np.hstack([np.isnan(X[rows]), missing[rows]]), axis=0, return_inverse=True)
+            inverse = inverse.ravel()
+            searches = []
+            for i, pattern in enumerate(patterns):
+                known, unknown = ~pattern[:len(cols_num)], pattern[len(cols_num):]
+                pattern_rows = rows[inverse == i]
+                if known.any() and len(donors_X) != 0:
+                    searches.append((pattern_rows, known, unknown, MissingValues._knn_tree(self, donors_X[:, known], n_neighbors)))
+                else:
+                    imputed[np.ix_(pattern_rows, np.flatnonzero(unknown))] = fallback[unknown]
+            bounds = Partitions.bounds(self, df)
+            if len(bounds) == 1:
+                queried = MissingValues._knn_query(self, X, searches, donors_Y, type)
+            else:
+                # the trees are fit once, and the observations of every partition are searched with them in parallel
+                tasks = [(X[start:stop], [(x[(x >= start) & (x < stop)] - start, known, unknown, nn) for x, known, unknown, nn in searches], donors_Y, type)
+                         for start, stop in bounds]
+                queried = np.vstack(Partitions.run(self, MissingValues._knn_query, tasks))
+            imputed = np.where(np.isnan(queried), imputed, queried)
+        for i, (feature, mapping) in enumerate(targets.items()):
+            try:
+                filled = missing[:, i] & ~np.isnan(imputed[:, i])
+                counter = int(filled.sum())
+                if counter == 0:
+                    continue
+                if mapping is None:
+                    # numerical feature
+                    values = df[feature].to_numpy(dtype=float, na_value=np.nan)
+                    values[filled] = imputed[filled, i]
+                    # the INT check is not taken from the facts recorded before the imputation, so that it is the same with and without partitions
+                    self.profile.invalidate([feature])
+                    if self.profile.is_int(df, feature):
+                        # round back to INTs, if original data were INTs
+                        df[feature] = pd.Series(values, index=df.index).round().astype('Int64')
+                    else:
+                        df[feature] = values
+                else:
+                    # categorical feature, map the label codes back to original values
+                    mappings_inv = {v: k for k, v in mapping.items()}
+                    df.loc[filled, feature] = pd.Series(imputed[filled, i], index=df.index[filled]).map(mappings_inv)
+                self.profile.invalidate([feature])
+                # the neighbor searches are shared by all features, only the imputed values are counted per feature
+                self.report.feature(feature, cells=counter)
+                logger.debug('KNN imputation of {} value(s) succeeded for feature "{}"', counter, feature)
             except:
-                pass
+                logger.warning('KNN imputation failed for feature "{}"', feature)
         return df
 
+    def _knn_search(self, donors_X, donors_Y, X, n_neighbors, type):
+        # function that searches the nearest donors of the observations with a new tree
+        nn = MissingValues._knn_tree(self, donors_X, n_neighbors)
+        return MissingValues._knn_values(self, nn, donors_Y, X, type)
+
+    def _knn_tree(self, donors_X, n_neighbors):
+        # function that fits the tree for searching the nearest donors
+        from sklearn.neighbors import NearestNeighbors
+        return NearestNeighbors(n_neighbors=min(n_neighbors, len(donors_X))).fit(donors_X)
+
+    def _knn_query(self, X, searches, donors_Y, type):
+        # function that imputes the observations of every missingness pattern with its tree, the other observations stay missing
+        imputed = np.full((len(X), donors_Y.shape[1]), np.nan)
+        for rows, known, unknown, nn in searches:
+            imputed[np.ix_(rows, np.flatnonzero(unknown))] = MissingValues._knn_values(self, nn, donors_Y[:, unknown], X[np.ix_(rows, known)], type)
+        return imputed
+
+    def _knn_values(self, nn, donors_Y, X, type, chunksize=10000):
+        # function that returns the mean or mode of the nearest donors, the observations are queried in chunks to bound the memory
+        values = np.empty((len(X), donors_Y.shape[1]))
+        for start in range(0, len(X), chunksize):
+            neighbors = donors_Y[nn.kneighbors(X[start:start+chunksize], return_distance=False)]
+            if type == 'num':
+                values[start:start+chunksize] = neighbors.mean(axis=1)
+            else:
+                # most frequent label code among the neighbors, ties go to the lowest code
+                neighbors = np.sort(neighbors, axis=1)
+                counts = (neighbors[:, :, None, :] == neighbors[:, None, :, :]).sum(axis=2)
+                values[start:start+chunksize] = np.take_along_axis(neighbors, counts.argmax(axis=1)[:, None, :], axis=1)[:, 0, :]
+        return values
+
+    def _sample(self, count, strata=None):
+        # function that returns the positions of at most 'sample_size' training observations and of a holdout for estimating the quality,
+        # or (None, None) if all observations are used
+        if not self.sample_size or count <= self.sample_size:
+            return None, None
+        rng = np.random.default_rng(0)
+        # observations are shuffled within their stratum and drawn at even steps, so that every stratum keeps its share
+        keys = rng.random(count)
+        order = np.argsort(keys) if strata is None else np.lexsort((keys, strata))
+        step = count / self.sample_size
+        sample = np.sort(order[(np.arange(self.sample_size) * step + rng.random() * step).astype(int)])
+        rest = np.setdiff1d(np.arange(count), sample, assume_unique=True)
+        holdout = np.sort(rng.choice(rest, min(len(rest), max(100, self.sample_size // 10)), replace=False))
+        return sample, holdout
+
+    def _quality(self, actual, predicted, categorical):
+        # function that returns the accuracy of CATEGORICAL or the R2 of NUMERICAL predictions
+        if categorical:
+            return float((actual == predicted).mean())
+        total = ((actual - actual.mean()) ** 2).sum()
+        return float(1 - ((actual - predicted) ** 2).sum() / total) if total > 0 else None
+
+    def _lin_regression_impute(self, df, model):
+        # function for predicting missing values with linear regression
+        cols_num = self.profile.numerical(df)
+        return MissingValues._regression_impute(self, df, model, cols_num, 'LINREG')
+
     def _log_regression_impute(self, df, model):
         # function for predicting missing values with logistic regression
-        cols_num = df.select_dtypes(include=np.number).columns
+        target_cols = self.profile.categorical(df)
+        return MissingValues._regression_impute(self, df, model, target_cols, 'LOGREG')
+
+    def _regression_impute(self, df, model, target_cols, method):
+        # function that fits one regression model per target feature and predicts its missing values
+        if all(self.profile.nulls(df, x) == 0 for x in target_cols):
+            return df
         mapping = dict()
-        for feature in df.columns:
-            if feature not in cols_num:
-                # create label mapping for categorical feature values
-                mappings = {k: i for i, k in enumerate(df[feature])} #.dropna().unique(), 0)}
-                mapping[feature] = mappings
-                df[feature] = df[feature].map(mapping[feature])
+        for feature in self.profile.categorical(df):
+            # create label mapping for categorical feature values
+            mapping[feature] = {k: i for i, k in enumerate(df[feature])}
+        columns = list(df.columns)
+        values = MissingValues._encode_labels(self, df, mapping)
+        # group the observations by missingness pattern once: all models are trained on the complete observations,
+        # and each model predicts the observations where only its target feature is missing
+        complete, test_rows = MissingValues._plan(self, values)
+        targets = [x for x in target_cols if test_rows[:, columns.index(x)].any()]
+        indexes = [columns.index(x) for x in targets]
+        train = values[complete]
+        if method == 'LINREG':
+            # all linear regressions share the standardized observations and are solved at once, on the same sample
+            sample, holdout = MissingValues._sample(self, len(train))
+            samples = {j: (sample, holdout) for j in indexes}
+            fits = MissingValues._fit_linear(self, train if sample is None else train[sample], indexes)
+        else:
+            # the sample of each logistic regression is stratified by its target, so that every category keeps its share
+            samples = {j: MissingValues._sample(self, len(train), train[:, j]) for j in indexes}
+            # large arrays are memory-mapped by joblib and shared with the workers instead of being copied per task
+            from joblib import Parallel, delayed
+            fits = Parallel(n_jobs=self.n_jobs)(delayed(MissingValues._fit_model)(train if samples[j][0] is None else train[samples[j][0]], j,
+                                                                                  [i for i in range(len(columns)) if i != j], model)
+                                                for j in indexes)
+        models = dict()
+        for feature, j, fit in zip(targets, indexes, fits):
+            start = timer()
+            try:
+                if fit is None:
+                    raise ValueError(feature)
+                pipe, log = fit
+                models[feature] = (pipe, [x for x in columns if x != feature], log)
+                is_int = feature in mapping or self.profile.is_int(df, feature)
+                counter = MissingValues._predict_feature(self, values, columns, feature, models[feature], test_rows[:, j], is_int)
+                sample, holdout = samples[j]
+                quality = None
+                if sample is not None:
+                    # the quality of the model is estimated on complete observations that were not in the sample
+                    others = [i for i in range(len(columns)) if i != j]
+                    pred = pipe.predict(train[np.ix_(holdout, others)])
+                    pred = np.exp(pred) if log else pred
+                    quality = MissingValues._quality(self, train[holdout, j], np.round(pred) if is_int else pred, feature in mapping)
+                    logger.debug('{} model fit on {} of {} observation(s) for feature "{}", quality estimate {}', method, len(sample), len(train), feature, quality)
+                self.report.feature(feature, timer() - start, counter, sample_size=len(train) if sample is None else len(sample), quality=quality)
+                logger.debug('{} imputation of {} value(s) succeeded for feature "{}"', method, counter, feature)
+            except:
+                logger.warning('{} imputation failed for feature "{}"', method, feature)
+        state = (method, mapping, models)
+        self.fitted.steps.append((MissingValues._predict, state))
+        return MissingValues._update(self, df, values, columns, state)
 
-        target_cols = [x for x in df.columns if x not in cols_num]
-            
-        for feature in df.columns: 
-            if feature in target_cols:
-                try:
-                    test_df = df[df[feature].isnull()==True].dropna(subset=[x for x in df.columns if x != feature])
-                    train_df = df[df[feature].isnull()==False].dropna(subset=[x for x in df.columns if x != feature])
-                    if len(test_df.index) != 0:
-                        pipe = make_pipeline(StandardScaler(), model)
-
-                        y = train_df[feature]
-                        train_df.drop(feature, axis=1, inplace=True)
-                        test_df.drop(feature, axis=1, inplace=True)
-
-                        model = pipe.fit(train_df, y)
-                        
-                        pred = model.predict(test_df) # predict values
-                        test_df[feature]= pred
-
-                        if (df[feature].fillna(-9999) % 1  == 0).all():
-                            # round back to INTs, if original data were INTs
-                            test_df[feature] = test_df[feature].round()
-                            test_df[feature] = test_df[feature].astype('Int64')
-                            df[feature].update(test_df[feature])                             
-                        logger.debug('LOGREG imputation of {} value(s) succeeded for feature "{}"', len(pred), feature)
-                except:
-                    logger.warning('LOGREG imputation failed for feature "{}"', feature)
-        for feature in df.columns: 
+    def _plan(self, values):
+        # function that returns the complete observations, and per feature the observations where only this feature is missing
+        missing = np.isnan(values)
+        count = missing.sum(axis=1)
+        return count == 0, missing & (count == 1)[:, None]
+
+    def _fit_linear(self, train, targets):
+        # function that solves the linear regressions of all target features, each regressed on all other features,
+        # from a single Gram matrix of the standardized observations instead of one fit per feature
+        from sklearn.linear_model import LinearRegression
+        if len(train) == 0:
+            return [None] * len(targets)
+        center, scale = train.mean(axis=0), train.std(axis=0)
+        scale[~(scale > 0)] = 1
+        Z = (train - center) / scale
+        G = Z.T @ Z
+        full_rank = np.linalg.matrix_rank(G) == len(G)
+        if full_rank:
+            P = np.linalg.inv(G)
+        fits = []
+        for j in targets:
+            # log-transform the target, unless it has values that are not positive
+            log = bool((train[:, j] > 0).all())
+            y = np.log(train[:, j]) if log else train[:, j]
+            others = np.arange(len(G)) != j
+            rhs = Z[:, others].T @ (y - y.mean())
+            if full_rank:
+                # inverse of the Gram matrix without feature j, derived from the inverse of the full Gram matrix
+                inv = P[np.ix_(others, others)] - np.outer(P[others, j], P[j, others]) / P[j, j]
+                beta = inv @ rhs
+            else:
+                beta = np.linalg.lstsq(G[np.ix_(others, others)], rhs, rcond=None)[0]
+            model = LinearRegression()
+            model.coef_ = beta / scale[others]
+            model.intercept_ = y.mean() - center[others] @ model.coef_
+            model.n_features_in_ = len(model.coef_)
+            fits.append((model, log))
+        return fits
+
+    @staticmethod
+    def _fit_model(train, target, predictors, model):
+        # function that fits the regression model of a single feature, runs in a worker when n_jobs is not 1
+        from sklearn.base import clone
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import StandardScaler
+        try:
+            pipe = make_pipeline(StandardScaler(), clone(model))
+            pipe.fit(train[:, predictors], train[:, target])
+            return pipe, False
+        except:
+            return None
+
+    def _predict(self, df, state):
+        # function that predicts missing values with the fitted regression models
+        if Partitions.is_partitioned(self, df):
+            # the missing values of every partition are predicted in parallel
+            return Partitions.apply(self, MissingValues._predict, df, state, is_int=True)
+        method, mapping, models = state
+        columns = list(df.columns)
+        values = MissingValues._encode_labels(self, df, mapping)
+        complete, test_rows = MissingValues._plan(self, values)
+        for feature, model in models.items():
+            start = timer()
             try:
-                # map categorical feature values back to original
-                mappings_inv = {v: k for k, v in mapping[feature].items()}
-                df[feature] = df[feature].map(mappings_inv)
+                is_int = feature in mapping or self.profile.is_int(df, feature)
+                counter = MissingValues._predict_feature(self, values, columns, feature, model, test_rows[:, columns.index(feature)], is_int)
+                self.report.feature(feature, timer() - start, counter)
+                logger.debug('{} imputation of {} value(s) succeeded for feature "{}"', method, counter, feature)
             except:
-                pass     
+                logger.warning('{} imputation failed for feature "{}"', method, feature)
+        return MissingValues._update(self, df, values, columns, state)
+
+    def _predict_feature(self, values, columns, feature, model, test_rows, is_int):
+        # function that predicts the missing values of a feature where all predictors are known
+        pipe, predictors, log = model
+        if not test_rows.any():
+            return 0
+        pred = pipe.predict(values[np.ix_(test_rows, [columns.index(x) for x in predictors])])
+        if log:
+            pred = np.exp(pred)
+        if is_int:
+            # round back to INTs, if original data were INTs
+            pred = np.round(pred)
+        values[test_rows, columns.index(feature)] = pred
+        return len(pred)
+
+    def _encode_labels(self, df, mapping):
+        # function that returns the data as FLOAT array with categorical features mapped to their labels, filled column by column instead of copying the data first
+        values = np.empty(df.shape, dtype=float)
+        for i, feature in enumerate(df.columns):
+            column = df[feature].map(mapping[feature]) if feature in mapping else df[feature]
+            values[:, i] = column.to_numpy(dtype=float, na_value=np.nan)
+        return values
+
+    def _update(self, df, values, columns, state):
+        # function that writes the predicted values back to the data
+        method, mapping, models = state
+        for feature in models:
+            predicted = values[:, columns.index(feature)]
+            filled = df[feature].isnull().to_numpy() & ~np.isnan(predicted)
+            if filled.any():
+                imputed = pd.Series(predicted[filled], index=df.index[filled])
+                if feature in mapping:
+                    # map categorical feature values back to original
+                    mappings_inv = {v: k for k, v in mapping[feature].items()}
+                    imputed = imputed.map(mappings_inv)
+                df.loc[filled, feature] = imputed
+                self.profile.invalidate([feature])
+        return df
+
+    def _drop_empty(self, df, state):
+        # function for deleting observations where all values are missing
+        empty = df.isna().all(axis=1).to_numpy()
+        if empty.any():
+            df = Adjust._keep(self, df, ~empty, reset_index=False)
+            self.profile.invalidate()
         return df
 
     def _delete(self, df, type):
         # function for deleting missing values
-        cols_num = df.select_dtypes(include=np.number).columns 
-        if type == 'num':
-            # numerical features
-            for feature in df.columns: 
-                if feature in cols_num:
-                    df = df.dropna(subset=[feature])
-                    df.reset_index(drop=True)
-        else:
-            # categorical features
-            for feature in df.columns:
-                if feature not in cols_num:
-                    df = df.dropna(subset=[feature])
-                    df.reset_index(drop=True)
+        cols_num = self.profile.numerical(df)
+        # numerical or categorical features
+        features = [x for x in df.columns if (x in cols_num) == (type == 'num')]
+        # observations with missing values in any of the features are deleted at once
+        keep = np.ones(len(df), dtype=bool)
+        for feature in features:
+            keep &= df[feature].notna().to_numpy()
+        if not keep.all():
+            df = Adjust._keep(self, df, keep, reset_index=False)
+        self.profile.invalidate()
         return df                    
 
 class Outliers:
 
-    def handle(self, df):
+    def handle(self, df, fused=False):
         # function for handling of outliers in the data
+        # with 'fused', the outliers are only clipped by the type conversion, which passes over every feature once
         if self.outliers:
             logger.info('Started handling of outliers... Method: "{}"', str(self.outliers).upper())
             start = timer()  
 
             if self.outliers in ['auto', 'winz']:  
-                df = Outliers._winsorization(self, df)
+                df = Outliers._winsorization(self, df, fused)
             elif self.outliers == 'delete':
                 df = Outliers._delete(self, df)
             
@@ -281,158 +583,446 @@ class Outliers:
             logger.info('Skipped handling of outliers')
         return df     
 
-    def _winsorization(self, df):
+    def _winsorization(self, df, fused=False):
         # function for outlier winsorization
-        cols_num = df.select_dtypes(include=np.number).columns    
-        for feature in cols_num:           
-            counter = 0
-            # compute outlier bounds
-            lower_bound, upper_bound = Outliers._compute_bounds(self, df, feature)    
-            for row_index, row_val in enumerate(df[feature]):
-                if row_val < lower_bound or row_val > upper_bound:
-                    if row_val < lower_bound:
-                        if (df[feature].fillna(-9999) % 1  == 0).all():
-                                df.loc[row_index, feature] = lower_bound
-                                df[feature] = df[feature].astype(int) 
-                        else:    
-                            df.loc[row_index, feature] = lower_bound
-                        counter += 1
-                    else:
-                        if (df[feature].fillna(-9999) % 1  == 0).all():
-                            df.loc[row_index, feature] = upper_bound
-                            df[feature] = df[feature].astype(int) 
-                        else:
-                            df.loc[row_index, feature] = upper_bound
-                        counter += 1
-            if counter != 0:
-                logger.debug('Outlier imputation of {} value(s) succeeded for feature "{}"', counter, feature)        
+        cols_num = self.profile.numerical(df)
+        # compute outlier bounds for all numerical features at once
+        bounds = Outliers._compute_bounds(self, df, cols_num)
+        self.fitted.steps.append((Outliers._clip, bounds))
+        if fused:
+            self.count_outliers = dict()
+            return df
+        return Outliers._clip(self, df, bounds)
+
+    def _clip(self, df, bounds):
+        # function that replaces outliers by the lower and upper bounds
+        lower_bounds, upper_bounds = bounds
+        self.count_outliers = dict()
+        for feature in lower_bounds.index:
+            df = Outliers._clip_column(self, df, feature, lower_bounds[feature], upper_bounds[feature])
+        return df
+
+    def _clip_column(self, df, feature, lower_bound, upper_bound):
+        # function that replaces the outliers of a feature by the lower and upper bound
+        start = timer()
+        values, counter = Outliers._clip_feature(self, df, feature, lower_bound, upper_bound)
+        if counter != 0:
+            df[feature] = values
+            self.profile.invalidate([feature])
+            self.report.feature(feature, timer() - start, counter)
+            logger.debug('Outlier imputation of {} value(s) succeeded for feature "{}"', counter, feature)
         return df
 
+    def _clip_feature(self, df, feature, lower_bound, upper_bound):
+        # function that returns the clipped values of a feature and the number of outliers, which is also kept in 'count_outliers'
+        values = df[feature]
+        counter = int(Outliers._is_outlier(self, values, lower_bound, upper_bound).sum())
+        self.count_outliers[feature] = counter
+        if counter == 0:
+            return values, counter
+        if self.profile.is_int(df, feature):
+            # INT features are clipped to the truncated bounds, as the outliers would be cast back to INT
+            values = values.clip(np.trunc(lower_bound), np.trunc(upper_bound))
+            if not values.isna().any() and not pd.api.types.is_integer_dtype(values):
+                values = values.astype(int)
+        else:
+            values = values.clip(lower_bound, upper_bound)
+        return values, counter
+
     def _delete(self, df):
         # function for deleting outliers in the data
-        cols_num = df.select_dtypes(include=np.number).columns    
-        for feature in cols_num:
-            counter = 0
-            lower_bound, upper_bound = Outliers._compute_bounds(self, df, feature)    
-            # delete observations containing outliers            
-            for row_index, row_val in enumerate(df[feature]):
-                if row_val < lower_bound or row_val > upper_bound:
-                    df = df.drop(row_index)
-                    counter +=1
-            df = df.reset_index(drop=True)
+        cols_num = self.profile.numerical(df)
+        if self.outlier_bounds == 'original' or self.incremental:
+            # bounds of all features are computed on the original data, incremental bounds can only be updated this way
+            bounds = Outliers._compute_bounds(self, df, cols_num)
+        else:
+            # bounds are computed on the observations left after deleting the outliers of the previous features
+            keep = np.ones(len(df), dtype=bool)
+            lower_bounds, upper_bounds = pd.Series(np.nan, index=cols_num), pd.Series(np.nan, index=cols_num)
+            for feature in cols_num:
+                lb, ub = Outliers._compute_bounds(self, df[[feature]][keep], [feature])
+                lower_bounds[feature], upper_bounds[feature] = lb[feature], ub[feature]
+                keep &= ~Outliers._is_outlier(self, df[feature], lb[feature], ub[feature])
+            bounds = (lower_bounds, upper_bounds)
+        self.fitted.steps.append((Outliers._drop, bounds))
+        return Outliers._drop(self, df, bounds)
+
+    def _drop(self, df, bounds):
+        # function that deletes the observations containing outliers, rows are only dropped once
+        lower_bounds, upper_bounds = bounds
+        keep = np.ones(len(df), dtype=bool)
+        self.count_outliers = dict()
+        for feature in lower_bounds.index:
+            is_outlier = Outliers._is_outlier(self, df[feature], lower_bounds[feature], upper_bounds[feature])
+            counter = int((is_outlier & keep).sum())
+            self.count_outliers[feature] = counter
+            keep &= ~is_outlier
             if counter != 0:
                 logger.debug('Deletion of {} outliers succeeded for feature "{}"', counter, feature)
+        # delete observations containing outliers
+        count_rows = int(len(df) - keep.sum())
+        if count_rows != 0:
+            df = Adjust._keep(self, df, keep)
+            self.profile.invalidate()
+            logger.debug('Deletion of {} observation(s) containing outliers succeeded', count_rows)
         return df
 
-    def _compute_bounds(self, df, feature):
+    def _update_bounds(self, df, bounds):
+        # function that adds new observations to the quantile sketches of the features, and returns the updated bounds
+        features = list(bounds[0].index)
+        for feature in features:
+            self.sketches[feature].update(df[feature].to_numpy(dtype=float, na_value=np.nan))
+        return Outliers._sketch_bounds(self, self.sketches, features)
+
+    def _is_outlier(self, values, lower_bound, upper_bound):
+        # boolean mask of the values outside of the bounds, missing values are no outliers
+        return ((values < lower_bound) | (values > upper_bound)).to_numpy(dtype=bool, na_value=False)
+
+    def _compute_bounds(self, df, features):
         # function that computes the lower and upper bounds for finding outliers in the data
-        featureSorted = sorted(df[feature])
-        
-        q1, q3 = np.percentile(featureSorted, [25, 75])
+        # bounds of all features are computed at once and returned as Series indexed by feature
+        if self.quantile_sketch:
+            # approximate quartiles from bounded-memory sketches
+            # partitions build their sketches in parallel, which are merged
+            sketches = Partitions.sketches(self, Outliers._sketch_quantiles, df, features)
+            if self.incremental:
+                # the sketches are kept, so that fitted.append() updates the bounds with new observations
+                self.fitted.sketches = sketches
+            return Outliers._sketch_bounds(self, sketches, features)
+        # exact quartiles in one NaN-aware call
+        values = df[features].to_numpy(dtype=float, na_value=np.nan)
+        q1, q3 = np.nanpercentile(values, [25, 75], axis=0)
+        return Outliers._iqr_bounds(self, q1, q3, features)
+
+    def _sketch_bounds(self, sketches, features):
+        # function that computes the lower and upper bounds from the quantile sketches of the features
+        q1, q3 = np.array([sketches[feature].quantile([0.25, 0.75]) for feature in features]).reshape(-1, 2).T
+        return Outliers._iqr_bounds(self, q1, q3, features)
+
+    def _iqr_bounds(self, q1, q3, features):
+        # function that computes the lower and upper bounds from the first and third quartiles
         iqr = q3 - q1
 
-        lb = q1 - (self.outlier_param * iqr) 
-        ub = q3 + (self.outlier_param * iqr) 
+        lb = pd.Series(q1 - (self.outlier_param * iqr), index=features)
+        ub = pd.Series(q3 + (self.outlier_param * iqr), index=features)
 
         return lb, ub    
 
+    def _sketch_quantiles(self, df, features, chunksize=65536):
+        # function that feeds the features chunk-wise into quantile sketches, without sorting or copying the full data
+        sketches = {feature: QuantileSketch(error=self.quantile_sketch) for feature in features}
+        for start in range(0, len(df), chunksize):
+            for feature in features:
+                sketches[feature].update(df[feature].iloc[start:start+chunksize].to_numpy(dtype=float, na_value=np.nan))
+        return sketches
+
 class Adjust:
 
+    # components extracted from DATETIME features, ordered by granularity
+    DATETIME_COMPONENTS = [('Day', 'day'), ('Month', 'month'), ('Year', 'year'), ('Hour', 'hour'), ('Minute', 'minute'), ('Sec', 'second')]
+    DATETIME_GRANULARITY = {'D': 1, 'M': 2, 'Y': 3, 'h': 4, 'm': 5, 's': 6, 'auto': 6}
+    # INT types tried by downcasting, from the smallest to the largest
+    INT_DTYPES = ['int8', 'int16', 'int32']
+    # decimals that are counted exactly with rounding, and the number of values whose further decimals are counted from their string
+    MAX_DECIMALS = 15
+    DECIMALS_SAMPLE = 10000
+
     def convert_datetime(self, df):
         # function for extracting of datetime values in the data
         if self.extract_datetime:
             logger.info('Started conversion of DATETIME features... Granularity: {}', self.extract_datetime)
             start = timer()
-            cols = set(df.columns) ^ set(df.select_dtypes(include=np.number).columns) 
+            cols = self.profile.categorical(df)
+            components = [name for name, _ in Adjust.DATETIME_COMPONENTS[:Adjust.DATETIME_GRANULARITY[self.extract_datetime]]]
+            datetimes = dict()
             for feature in cols: 
+                # DATETIME features and their format are detected on a sample of the values
+                feature_start = timer()
+                format = self.profile.datetime_format(df, feature)
+                if format is False:
+                    continue
                 try:
-                    # convert features encoded as strings to type datetime ['D','M','Y','h','m','s']
-                    df[feature] = pd.to_datetime(df[feature], infer_datetime_format=True)
-                    try:
-                        df['Day'] = pd.to_datetime(df[feature]).dt.day
-
-                        if self.extract_datetime in ['auto', 'M','Y','h','m','s']:
-                            df['Month'] = pd.to_datetime(df[feature]).dt.month
-
-                            if self.extract_datetime in ['auto', 'Y','h','m','s']:
-                                df['Year'] = pd.to_datetime(df[feature]).dt.year
-
-                                if self.extract_datetime in ['auto', 'h','m','s']:
-                                    df['Hour'] = pd.to_datetime(df[feature]).dt.hour
-
-                                    if self.extract_datetime in ['auto', 'm','s']:
-                                        df['Minute'] = pd.to_datetime(df[feature]).dt.minute
-
-                                        if self.extract_datetime in ['auto', 's']:
-                                            df['Sec'] = pd.to_datetime(df[feature]).dt.second
-                        
-                        logger.debug('Conversion to DATETIME succeeded for feature "{}"', feature)
-
-                        try: 
-                            # check if entries for the extracted dates/times are non-NULL, otherwise drop
-                            if (df['Hour'] == 0).all() and (df['Minute'] == 0).all() and (df['Sec'] == 0).all():
-                                df.drop('Hour', inplace = True, axis =1 )
-                                df.drop('Minute', inplace = True, axis =1 )
-                                df.drop('Sec', inplace = True, axis =1 )
-                            elif (df['Day'] == 0).all() and (df['Month'] == 0).all() and (df['Year'] == 0).all():
-                                df.drop('Day', inplace = True, axis =1 )
-                                df.drop('Month', inplace = True, axis =1 )
-                                df.drop('Year', inplace = True, axis =1 )   
-                        except:
-                            pass          
+                    # convert features encoded as strings to type datetime ['D','M','Y','h','m','s'], the full feature is only parsed once
+                    parsed = Adjust._parse_datetime(self, df[feature], format)
+                    if parsed.isna().sum() > self.profile.nulls(df, feature):
+                        # values outside of the sample are no dates
+                        self.profile.update(feature, datetime_format=False)
+                        continue
+                    changes = Adjust._changes(self, df[feature], parsed)
+                    df = Adjust._components(self, df, feature, parsed, components)
+                    self.report.feature(feature, timer() - feature_start, changes)
+                    logger.debug('Conversion to DATETIME succeeded for feature "{}"', feature)
+                    datetimes[feature] = (format, list(components))
+                    try: 
+                        # check if entries for the extracted dates/times are non-NULL, otherwise drop
+                        times, dates = [str(feature) + '_' + x for x in ['Hour', 'Minute', 'Sec']], [str(feature) + '_' + x for x in ['Day', 'Month', 'Year']]
+                        if (df[times] == 0).all().all():
+                            df.drop(times, inplace = True, axis =1 )
+                            self.profile.invalidate(times)
+                            datetimes[feature] = (format, [x for x in components if x not in ['Hour', 'Minute', 'Sec']])
+                        elif (df[dates] == 0).all().all():
+                            df.drop(dates, inplace = True, axis =1 )
+                            self.profile.invalidate(dates)
+                            datetimes[feature] = (format, [x for x in components if x not in ['Day', 'Month', 'Year']])
                     except:
-                        # feature cannot be converted to datetime
-                        logger.warning('Conversion to DATETIME failed for "{}"', feature)
+                        pass          
                 except:
-                    pass
+                    # feature cannot be converted to datetime
+                    logger.warning('Conversion to DATETIME failed for "{}"', feature)
+            self.fitted.steps.append((Adjust._extract_datetime, datetimes))
             end = timer()
             logger.info('Completed conversion of DATETIME features in {} seconds', round(end-start, 4))
         else:
             logger.info('Skipped datetime feature conversion')
         return df
 
-    def round_values(self, df, input_data):
+    def _extract_datetime(self, df, datetimes):
+        # function that parses DATETIME features with their learned format and extracts their components to separate features
+        if Partitions.is_partitioned(self, df) and all(format is not None and '%z' not in format for format, _ in datetimes.values()):
+            # the partitions are parsed in parallel, unless a format is inferred while parsing or time zones may differ per partition
+            return Partitions.apply(self, Adjust._extract_datetime, df, datetimes)
+        for feature, (format, components) in datetimes.items():
+            start = timer()
+            parsed = Adjust._parse_datetime(self, df[feature], format)
+            changes = Adjust._changes(self, df[feature], parsed)
+            df = Adjust._components(self, df, feature, parsed, components)
+            self.report.feature(feature, timer() - start, changes)
+        return df
+
+    def _parse_datetime(self, values, format):
+        # function that parses a feature to DATETIME, values that do not match the format become NaT
+        if format is None:
+            return pd.to_datetime(values, errors='coerce')
+        return pd.to_datetime(values, format=format, errors='coerce')
+
+    def _components(self, df, feature, parsed, components):
+        # function that replaces a feature by its parsed DATETIME values and adds their components, prefixed with the feature name
+        # the components are extracted before the data is changed, so that the data is left as it was if the extraction fails
+        values = parsed.dt
+        extracted = {str(feature) + '_' + name: getattr(values, attr) for name, attr in Adjust.DATETIME_COMPONENTS if name in components}
+        df[feature] = parsed
+        for name, values in extracted.items():
+            df[name] = values
+        self.profile.invalidate([feature] + list(extracted))
+        return df
+
+    def round_values(self, df, input_data, fused=False):
         # function that checks datatypes of features and converts them if necessary
+        # with 'fused', the outliers of the learned bounds are clipped in the same pass over each feature
         if self.duplicates or self.missing_num or self.missing_categ or self.outliers or self.encode_categ or self.extract_datetime:
             logger.info('Started feature type conversion...')
             start = timer()
-            counter = 0
-            cols_num = df.select_dtypes(include=np.number).columns
+            cols_num = self.profile.numerical(df)
+            lower_bounds, upper_bounds = [state for apply, state in self.fitted.steps if apply is Outliers._clip][-1] if fused else (pd.Series(dtype=float),) * 2
+            dtypes = dict()
             for feature in cols_num:
-                    # check if all values are integers
-                    if (df[feature].fillna(-9999) % 1  == 0).all():
-                        try:
-                            # encode FLOATs with only 0 as decimals to INT
-                            df[feature] = df[feature].astype('Int64')
-                            counter += 1
-                            logger.debug('Conversion to type INT succeeded for feature "{}"', feature)
-                        except:
-                            logger.warning('Conversion to type INT failed for feature "{}"', feature)
-                    else:
-                        try:
-                            df[feature] = df[feature].astype(float)
-                            # round the number of decimals of FLOATs back to original
-                            dec = None
-                            for value in input_data[feature]:
-                                try:
-                                    if dec == None:
-                                        dec = str(value)[::-1].find('.')
-                                    else:
-                                        if str(value)[::-1].find('.') > dec:
-                                            dec = str(value)[::-1].find('.')
-                                except:
-                                    pass
-                            df[feature] = df[feature].round(decimals = dec)
-                            counter += 1
-                            logger.debug('Conversion to type FLOAT succeeded for feature "{}"', feature)
-                        except:
-                            logger.warning('Conversion to type FLOAT failed for feature "{}"', feature)
+                if feature in lower_bounds.index:
+                    # the outliers are clipped first, as the INT check depends on the clipped values
+                    df = Outliers._clip_column(self, df, feature, lower_bounds[feature], upper_bounds[feature])
+                # check if all values are integers
+                if self.profile.is_int(df, feature):
+                    # encode FLOATs with only 0 as decimals to INT
+                    dtypes[feature] = ('INT', None)
+                else:
+                    # round the number of decimals of FLOATs back to original
+                    if input_data is not None and feature in input_data.columns and feature not in self.decimals:
+                        # the decimals of a feature are only inferred once, and reused afterwards
+                        self.decimals[feature] = Adjust._decimals(self, input_data[feature])
+                    dtypes[feature] = ('FLOAT', self.decimals.get(feature))
+                # the feature is converted right away, instead of in a second pass over all features
+                df = Adjust._cast(self, df, {feature: dtypes[feature]})
+            for feature in lower_bounds.index.difference(cols_num, sort=False):
+                df = Outliers._clip_column(self, df, feature, lower_bounds[feature], upper_bounds[feature])
+            self.fitted.steps.append((Adjust._cast, dtypes))
             end = timer()
-            logger.info('Completed feature type conversion for {} feature(s) in {} seconds', counter, round(end-start, 6))
+            logger.info('Completed feature type conversion for {} feature(s) in {} seconds', len(dtypes), round(end-start, 6))
         else:
             logger.info('Skipped feature type conversion')
         return df
 
+    def _cast(self, df, dtypes):
+        # function that converts features to INT or rounded FLOAT types
+        for feature, (dtype, dec) in dtypes.items():
+            start = timer()
+            try:
+                values = Adjust._cast_feature(self, df[feature], dtype, dec)
+                changes = Adjust._changes(self, df[feature], values)
+                df[feature] = values
+                self.profile.invalidate([feature])
+                self.report.feature(feature, timer() - start, changes)
+                logger.debug('Conversion to type {} succeeded for feature "{}"', dtype, feature)
+            except:
+                logger.warning('Conversion to type {} failed for feature "{}"', dtype, feature)
+        return df
+
+    def _cast_feature(self, values, dtype, dec):
+        # function that converts the values of a feature to INT or to a FLOAT rounded to 'dec' decimals
+        if dtype == 'INT':
+            return values.round().astype('Int64')
+        values = values.astype(float)
+        return values.round(decimals = dec) if dec is not None else values
+
+    def _clip_cast(self, df, state):
+        # function that clips the outliers and converts the type of each feature in one pass, instead of one pass per step
+        bounds, dtypes = state
+        lower_bounds, upper_bounds = bounds
+        self.count_outliers = dict()
+        for feature in list(dtypes) + [x for x in lower_bounds.index if x not in dtypes]:
+            start = timer()
+            values, counter = df[feature], 0
+            if feature in lower_bounds.index:
+                values, counter = Outliers._clip_feature(self, df, feature, lower_bounds[feature], upper_bounds[feature])
+            try:
+                if feature in dtypes:
+                    values = Adjust._cast_feature(self, values, *dtypes[feature])
+                elif counter == 0:
+                    continue
+            except:
+                # the clipped values are kept, as they would be without the fused pass
+                logger.warning('Conversion to type {} failed for feature "{}"', dtypes[feature][0], feature)
+                if counter == 0:
+                    continue
+            changes = Adjust._changes(self, df[feature], values)
+            df[feature] = values
+            self.profile.invalidate([feature])
+            self.report.feature(feature, timer() - start, changes)
+        return df
+
+    def downcast(self, df):
+        # function that converts the features to the smallest types that keep their values
+        if self.downcast:
+            logger.info('Started downcasting of feature types...')
+            start = timer()
+            dtypes = dict()
+            for feature in df.columns:
+                dtype = Adjust._smallest_dtype(self, df, feature)
+                if dtype is not None:
+                    dtypes[feature] = dtype
+            self.fitted.steps.append((Adjust._downcast, dtypes))
+            df = Adjust._downcast(self, df, dtypes)
+            end = timer()
+            logger.info('Completed downcasting of {} feature(s) in {} seconds', len(dtypes), round(end-start, 6))
+        else:
+            logger.info('Skipped downcasting of feature types')
+        return df
+
+    def _smallest_dtype(self, df, feature):
+        # function that returns the smallest type of a feature as (dtype, decimals), or None if its type is kept
+        values = df[feature]
+        if isinstance(values.dtype, pd.SparseDtype) or pd.api.types.is_bool_dtype(values):
+            return None
+        if pd.api.types.is_integer_dtype(values):
+            # nullable INTs stay nullable, so that missing values in new data can still be stored
+            for dtype in Adjust.INT_DTYPES:
+                dtype = dtype.capitalize() if pd.api.types.is_extension_array_dtype(values) else dtype
+                if dtype != str(values.dtype) and Adjust._fits(self, values, dtype, None):
+                    return (dtype, None)
+            return None
+        if pd.api.types.is_float_dtype(values) and values.dtype != np.float32:
+            # FLOATs are stored as float32 if their values are the same when rounded to the original number of decimals
+            dec = self.decimals.get(feature)
+            return ('float32', dec) if Adjust._fits(self, values, 'float32', dec) else None
+        if values.dtype == object:
+            # low-cardinality features are stored once per category instead of once per observation
+            # the categories are learned, so that new data gets the same type as the fitted data
+            known = len(values) - self.profile.nulls(df, feature)
+            if known == 0 or self.profile.nunique(df, feature) > known / 2:
+                return None
+            return (pd.CategoricalDtype(pd.Categorical(pd.unique(values.dropna())).categories), None)
+        return None
+
+    def _fits(self, values, dtype, dec):
+        # function that checks whether the values of a feature can be stored as 'dtype' without changing them
+        if isinstance(dtype, pd.CategoricalDtype):
+            # values that are not learned categories would become missing values
+            return bool((values.isin(dtype.categories) | values.isna()).all())
+        if dtype == 'float32':
+            original = values.to_numpy(dtype=float, na_value=np.nan)
+            converted = original.astype(np.float32).astype(float)
+            if dec is not None:
+                converted = np.round(converted, dec)
+            return bool(((converted == original) | np.isnan(original)).all())
+        # INT types, pandas does not check the range when converting
+        info = np.iinfo(dtype.lower())
+        return values.isna().all() or (info.min <= values.min() and values.max() <= info.max)
+
+    def _downcast(self, df, dtypes):
+        # function that converts the features to their learned types, features whose new values do not fit keep a larger type
+        # the memory of the data before and after is added to the run report
+        before = int(df.memory_usage(deep=True).sum())
+        for feature, (dtype, dec) in dtypes.items():
+            start = timer()
+            try:
+                values = df[feature]
+                if not Adjust._fits(self, values, dtype, dec):
+                    # e.g. new LABEL codes or larger values than in the fitted data, INTs get the next larger type that fits
+                    # features with new categories keep their type
+                    larger = Adjust.INT_DTYPES[Adjust.INT_DTYPES.index(dtype.lower())+1:] if isinstance(dtype, str) and dtype.lower() in Adjust.INT_DTYPES else []
+                    larger = [x.capitalize() if dtype[0] == 'I' else x for x in larger if Adjust._fits(self, values, x, None)]
+                    if len(larger) == 0:
+                        logger.warning('Downcasting to type {} skipped for feature "{}", the values do not fit', dtype, feature)
+                        continue
+                    dtype = larger[0]
+                downcast = values.astype(dtype)
+                changes = Adjust._changes(self, values, downcast)
+                df[feature] = downcast
+                self.profile.invalidate([feature])
+                self.report.feature(feature, timer() - start, changes)
+            except:
+                logger.warning('Downcasting to type {} failed for feature "{}"', dtype, feature)
+        after = int(df.memory_usage(deep=True).sum())
+        self.report.bytes_before, self.report.bytes_after = before, after
+        logger.debug('Downcasting reduced the memory of the data from {} to {} bytes', before, after)
+        return df
+
+    def _keep(self, df, keep, reset_index=True):
+        # function that keeps the observations where 'keep' is True
+        # with 'low_memory' the data is changed in place, so that the old data is freed instead of being kept alive by the caller
+        # the cells of the deleted observations are counted as modified cells of every feature
+        deleted = int((~keep).sum())
+        for feature in df.columns:
+            self.report.feature(feature, cells=deleted)
+        if self.low_memory:
+            df.drop(index=df.index[~keep], inplace=True)
+            if reset_index:
+                df.reset_index(drop=True, inplace=True)
+            return df
+        df = df[keep]
+        return df.reset_index(drop=True) if reset_index else df
+
+    def _changes(self, before, after):
+        # function that counts the cells whose value or type was changed, missing values that stay missing are not counted
+        known = before.notna().to_numpy() | after.notna().to_numpy()
+        if before.dtype != after.dtype:
+            return int(known.sum())
+        return int((known & ~(before == after).to_numpy(dtype=bool, na_value=False)).sum())
+
+    def _decimals(self, values):
+        # function that finds the maximum number of decimals of the original values
+        values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        values = np.unique(values[np.isfinite(values)])
+        if len(values) == 0:
+            return None
+        # the values that keep their value when rounded to 'dec' decimals are done, the others are tried with one more decimal
+        # the integer part is split off as well, so that the rounding of large values is exact
+        integer = np.trunc(values)
+        fraction = values - integer
+        for dec in range(Adjust.MAX_DECIMALS + 1):
+            exact = (np.round(values, dec) == values) | (integer + np.round(fraction, dec) == values)
+            values, integer, fraction = values[~exact], integer[~exact], fraction[~exact]
+            if len(values) == 0:
+                # at least one decimal, as in the shortest representation of a FLOAT, e.g. '12.0'
+                return max(dec, 1)
+        # more decimals are counted on the shortest representation of a sample of the remaining values, e.g. '0.30000000000000004' or '1.5e-17'
+        if len(values) > Adjust.DECIMALS_SAMPLE:
+            values = np.random.default_rng(0).choice(values, Adjust.DECIMALS_SAMPLE, replace=False)
+        strings = np.char.lower(values.astype(str))
+        mantissa, _, exponent = np.char.partition(strings, 'e').T
+        exponent = np.where(exponent == '', '0', exponent).astype(int)
+        fraction = np.char.partition(mantissa, '.')[:, 2]
+        # the exponent shifts the decimals of the mantissa, e.g. '1.5e-17' has 18 decimals
+        return int(max((np.char.str_len(fraction) - exponent).max(), Adjust.MAX_DECIMALS + 1))
+
 class EncodeCateg:
 
     def handle(self, df):
@@ -441,7 +1031,7 @@ class EncodeCateg:
             if not isinstance(self.encode_categ, list):
                 self.encode_categ = ['auto']
             # select non numeric features
-            cols_categ = set(df.columns) ^ set(df.select_dtypes(include=np.number).columns) 
+            cols_categ = self.profile.categorical(df)
             # check if all columns should be encoded
             if len(self.encode_categ) == 1:
                 target_cols = cols_categ # encode ALL columns
@@ -449,6 +1039,9 @@ class EncodeCateg:
                 target_cols = self.encode_categ[1] # encode only specific columns
             logger.info('Started encoding categorical features... Method: "{}"', str(self.encode_categ[0]).upper())
             start = timer()
+            encodings = dict()
+            # LABEL codes found while learning the vocabularies, which are reused to encode the data
+            codes = dict()
             for feature in target_cols:
                 if feature in cols_categ:
                     # columns are column names
@@ -456,63 +1049,135 @@ class EncodeCateg:
                 else:
                     # columns are indexes
                     feature = df.columns[feature]
-                try:
+                if self.profile.is_datetime(df, feature):
                     # skip encoding of datetime features
-                    pd.to_datetime(df[feature])
                     logger.debug('Skipped encoding for DATETIME feature "{}"', feature)
-                except:
+                else:
                     try:
                         if self.encode_categ[0] == 'auto':
-                            # ONEHOT encode if not more than 10 unique values to encode
-                            if df[feature].nunique() <=10:
-                                df = EncodeCateg._to_onehot(self, df, feature)
+                            method = EncodeCateg._auto_method(self, self.profile.nunique(df, feature))
+                            if method == 'ONEHOT':
+                                df = EncodeCateg._to_onehot(self, df, feature, encodings)
                                 logger.debug('Encoding to ONEHOT succeeded for feature "{}"', feature)
-                            # LABEL encode if not more than 20 unique values to encode
-                            elif df[feature].nunique() <=20:
-                                df = EncodeCateg._to_label(self, df, feature)
+                            elif method == 'LABEL':
+                                df = EncodeCateg._to_label(self, df, feature, encodings, codes)
                                 logger.debug('Encoding to LABEL succeeded for feature "{}"', feature)
-                            # skip encoding if more than 20 unique values to encode
                             else:
                                 logger.debug('Encoding skipped for feature "{}"', feature)   
 
                         elif self.encode_categ[0] == 'onehot':
-                            df = EncodeCateg._to_onehot(df, feature)
+                            df = EncodeCateg._to_onehot(self, df, feature, encodings)
                             logger.debug('Encoding to {} succeeded for feature "{}"', str(self.encode_categ[0]).upper(), feature)
                         elif self.encode_categ[0] == 'label':
-                            df = EncodeCateg._to_label(df, feature)
+                            df = EncodeCateg._to_label(self, df, feature, encodings, codes)
                             logger.debug('Encoding to {} succeeded for feature "{}"', str(self.encode_categ[0]).upper(), feature)      
                     except:
                         logger.warning('Encoding to {} failed for feature "{}"', str(self.encode_categ[0]).upper(), feature)    
+            # the encoded features of all features are added at once
+            df = EncodeCateg._encode(self, df, encodings, codes)
+            self.fitted.steps.append((EncodeCateg._encode, encodings))
             end = timer()
             logger.info('Completed encoding of categorical features in {} seconds', round(end-start, 6))
         else:
             logger.info('Skipped encoding of categorical features')
         return df
 
-    def _to_onehot(self, df, feature, limit=10):  
+    def _auto_method(self, nunique):
+        # ONEHOT encode if not more than 10 unique values to encode
+        if nunique <= 10:
+            return 'ONEHOT'
+        # LABEL encode if not more than 20 unique values to encode
+        elif nunique <= 20:
+            return 'LABEL'
+        # skip encoding if more than 20 unique values to encode
+        return None
+
+    def _sorted(self, categories):
+        # function that sorts categories like the LabelEncoder, unsortable categories keep their order
+        try:
+            return np.array(sorted(categories))
+        except TypeError:
+            return np.array(list(categories))
+
+    def _to_onehot(self, df, feature, encodings, limit=10):  
         # function that encodes categorical features to OneHot encodings    
-        one_hot = pd.get_dummies(df[feature], prefix=feature)
-        if one_hot.shape[1] > limit:
-            logger.warning('ONEHOT encoding for feature "{}" creates {} new features. Consider LABEL encoding instead.', feature, one_hot.shape[1])
-        # join the encoded df
-        df = df.join(one_hot)
+        categories = pd.Categorical(df[feature]).categories
+        if len(categories) > limit:
+            logger.warning('ONEHOT encoding for feature "{}" creates {} new features. Consider LABEL encoding instead.', feature, len(categories))
+        encodings[feature] = ('ONEHOT', categories)
         return df
 
-    def _to_label(self, df, feature):
-        # function that encodes categorical features to label encodings 
-        le = preprocessing.LabelEncoder()
+    def _to_label(self, df, feature, encodings, codes):
+        # function that learns the vocabulary of label encodings, the unique values are found by hashing instead of sorting all values
+        factorized, uniques = pd.factorize(df[feature])
+        categories = EncodeCateg._sorted(self, uniques)
+        encodings[feature] = ('LABEL', categories)
+        # the codes of the unique values are remapped to their position in the sorted vocabulary, missing values keep the code -1
+        positions = np.append(pd.Index(categories).get_indexer(uniques), -1)
+        codes[feature] = positions.take(factorized)
+        return df
 
-        df[feature + '_lab'] = le.fit_transform(df[feature].values)
-        mapping = dict(zip(le.classes_, range(len(le.classes_))))
-        
-        for key in mapping:
+    def _update_vocabulary(self, df, encodings):
+        # function that appends the new categories of LABEL encoded features to their vocabulary, the codes of known categories are kept
+        updated = dict()
+        for feature, (method, categories) in encodings.items():
+            if method == 'LABEL':
+                uniques = pd.unique(df[feature].dropna())
+                new = uniques[pd.Index(categories).get_indexer(uniques) == -1]
+                if len(new) != 0:
+                    categories = np.concatenate([categories, EncodeCateg._sorted(self, new)])
+                    logger.debug('Added {} new categories to the LABEL encoding of feature "{}"', len(new), feature)
+            updated[feature] = (method, categories)
+        return updated
+
+    def _encode(self, df, encodings, codes=None):
+        # function that encodes categorical features with the learned categories
+        # 'codes' are the LABEL codes of features that were already encoded while learning their vocabulary
+        encoded = []
+        for feature, (method, categories) in encodings.items():
+            start = timer()
             try:
-                if isnan(key):               
-                    replace = {mapping[key] : key }
-                    df[feature].replace(replace, inplace=True)
+                if method == 'ONEHOT':
+                    # dummies are compared from the category codes, and stored sparse if 'sparse_onehot' is set
+                    labels = pd.Categorical(df[feature], categories=categories).codes
+                    known = labels != -1
+                    one_hot = dict()
+                    for i, category in enumerate(categories):
+                        dummy = labels == i
+                        one_hot[str(feature) + '_' + str(category)] = pd.arrays.SparseArray(dummy, fill_value=False) if self.sparse_onehot else dummy
+                    encoded.append(pd.DataFrame(one_hot, index=df.index))
+                else:
+                    if codes is not None and feature in codes:
+                        # the codes of the fitted data, missing values have the code -1
+                        labels = codes[feature]
+                        known = labels != -1
+                    else:
+                        # one vectorized lookup in the vocabulary, missing values get the code -1 and unseen categories the code 'unseen_label'
+                        labels = pd.Index(categories).get_indexer(df[feature])
+                        known = df[feature].notna().to_numpy()
+                        labels[(labels == -1) & known] = self.unseen_label
+                    encoded.append(pd.DataFrame({str(feature) + '_lab': labels}, index=df.index))
+                # the encoded values of the known categories are counted, missing values stay missing
+                self.report.feature(feature, timer() - start, int(known.sum()))
             except:
-                pass
-        return df  
+                logger.warning('Encoding to {} failed for feature "{}"', method, feature)
+        if len(encoded) != 0:
+            if self.low_memory:
+                # add the encoded features to the data in place, instead of concatenating a new copy of the data
+                for block in encoded:
+                    for column in block.columns:
+                        df[column] = block[column]
+            else:
+                # concatenate the encoded df in one operation, instead of copying the df once per feature
+                df = pd.concat([df] + encoded, axis=1)
+            self.profile.invalidate([x for block in encoded for x in block.columns])
+        if self.drop_encoded:
+            if self.low_memory:
+                df.drop(columns=list(encodings), inplace=True)
+            else:
+                df = df.drop(columns=list(encodings))
+            self.profile.invalidate(list(encodings))
+        return df
 
 class Duplicates:
 
@@ -520,16 +1185,11 @@ class Duplicates:
         if self.duplicates:
             logger.info('Started handling of duplicates... Method: "{}"', str(self.duplicates).upper())
             start = timer()
-            original = df.shape
             try:
-                df.drop_duplicates(inplace=True, ignore_index=False)
-                df = df.reset_index(drop=True)
-                new = df.shape
-                count = original[0] - new[0]
-                if count != 0:
-                    logger.debug('Deletion of {} duplicate(s) succeeded', count)
-                else:
-                    logger.debug('{} missing values found', count)
+                # the store of seen hashes is part of the state, so that transform also deletes duplicates of earlier data
+                state = (self.duplicates_subset, Duplicates._store(self))
+                self.fitted.steps.append((Duplicates._drop, state))
+                df = Duplicates._drop(self, df, state)
                 end = timer()
                 logger.info('Completed handling of duplicates in {} seconds', round(end-start, 6))
 
@@ -538,3 +1198,56 @@ class Duplicates:
         else:
             logger.info('Skipped handling of duplicates')
         return df 
+
+    def _store(self):
+        # function that returns the store of seen row hashes: None, an exact HashSet, a BloomFilter or a store passed by the user
+        if self.duplicates_store is False:
+            # incremental processes delete duplicates of all earlier data
+            return HashSet() if self.incremental else None
+        if self.duplicates_store == 'exact':
+            return HashSet()
+        if isinstance(self.duplicates_store, float):
+            return BloomFilter(error=self.duplicates_store)
+        return self.duplicates_store
+
+    def _hash_rows(self, df, subset=None):
+        # function that hashes every row, or its 'subset' of features, into a 64-bit fingerprint
+        # numerical features are hashed as FLOATs, so that the same values hash equally across chunks with different dtypes
+        if subset is not None:
+            df = df[subset]
+        cols_num = self.profile.numerical(df)
+        hashable = df.copy(deep=False)
+        for feature in cols_num:
+            hashable[feature] = df[feature].astype(float)
+        return pd.util.hash_pandas_object(hashable, index=False).to_numpy()
+
+    def _drop(self, df, state, update=True):
+        # function that deletes all copies of duplicated observations except one, and observations already in the store
+        # with 'update' the hashes of the kept observations are added to the store
+        subset, store = state if state is not None else (None, None)
+        original = df.shape
+        try:
+            if store is None and len(df) < _DEDUP_ROWS:
+                is_dup = df.duplicated(subset=subset).to_numpy()
+            else:
+                # the rows of every partition are hashed in parallel
+                hashes = np.concatenate(Partitions.map(self, Duplicates._hash_rows, df, subset))
+                is_dup = pd.Series(hashes).duplicated().to_numpy()
+                if store is not None:
+                    is_dup |= store.contains(hashes)
+                    if update:
+                        store.update(hashes[~is_dup])
+        except:
+            # observations with unhashable values, e.g. lists, are kept as they are
+            logger.warning('Handling of duplicates failed')
+            return df
+        if is_dup.any():
+            df = Adjust._keep(self, df, ~is_dup)
+        new = df.shape
+        count = original[0] - new[0]
+        if count != 0:
+            self.profile.invalidate()
+            logger.debug('Deletion of {} duplicate(s) succeeded', count)
+        else:
+            logger.debug('{} missing values found', count)
+        return df
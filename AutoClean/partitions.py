@@ -0,0 +1,154 @@
+# AutoClean 2022
+# For detailed documentation and usage guide, please visit the official GitHub Repo.
+# https://github.com/elisemercury/AutoClean
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from AutoClean.columns import ColumnProfile
+
+'''
+Partitions split the data into row partitions that are processed by parallel worker processes.
+
+Statistics are computed per partition and merged, and the steps that change every observation on its own are applied per partition,
+with the facts of the full data, so that the output is the same as without partitions.
+'''
+
+class Partitions:
+
+    # minimum number of observations per partition, smaller data is split into fewer partitions
+    MIN_ROWS = 10000
+    # parameters of the process that are read by the functions running in the workers
+    PARAMS = ['quantile_sketch', 'unseen_label', 'sparse_onehot', 'drop_encoded']
+
+    def bounds(self, df):
+        # function that returns the (start, stop) positions of the row partitions, a single partition if the data is not partitioned
+        count = max(1, min(self.partitions, len(df) // Partitions.MIN_ROWS))
+        edges = np.linspace(0, len(df), count + 1).astype(int)
+        return list(zip(edges[:-1], edges[1:]))
+
+    def is_partitioned(self, df):
+        # whether the data is split into more than one partition
+        return len(Partitions.bounds(self, df)) > 1
+
+    def map(self, function, df, *args, facts=None):
+        # function that runs function(worker, partition, *args) on every partition in a worker process, and returns the results in order
+        # data that is not partitioned is processed as function(self, df, *args) without workers
+        bounds = Partitions.bounds(self, df)
+        if len(bounds) == 1:
+            return [function(self, df, *args)]
+        return Partitions.run(self, function, [(df.iloc[start:stop],) + args for start, stop in bounds], facts)
+
+    def run(self, function, tasks, facts=None):
+        # function that runs function(worker, *task) for every task in a worker process, and returns the results in order
+        # joblib is imported here, so that processes without partitions never load it
+        from joblib import Parallel, delayed
+        params = {x: getattr(self, x) for x in Partitions.PARAMS}
+        results = Parallel(n_jobs=len(tasks))(delayed(Partitions._run)(function, task, params, facts or dict()) for task in tasks)
+        # the log messages of the workers are logged by the main process
+        for _, messages in results:
+            for level, message in messages:
+                logger.log(level, message)
+        return [result for result, _ in results]
+
+    @staticmethod
+    def _run(function, task, params, facts):
+        # function that runs in a worker process, on a new cleaner whose column profile knows the given facts of the full data
+        from AutoClean.autoclean import FittedCleaner
+        messages = []
+        logger.remove()
+        logger.add(lambda message: messages.append((message.record['level'].name, message.record['message'])), level='DEBUG')
+        worker = FittedCleaner(dict(params, partitions=1, low_memory=False, verbose=False))
+        worker.profile = ColumnProfile()
+        for feature, values in facts.items():
+            worker.profile.update(feature, **values)
+        return function(worker, *task), messages
+
+    def statistics(self, df):
+        # function that counts the missing values, checks the INTs and counts the unique values of all features per partition,
+        # and records the merged facts in the column profile, where the modules find them without passing over the data again
+        if not Partitions.is_partitioned(self, df):
+            return
+        cols_num = self.profile.numerical(df)
+        results = Partitions.map(self, Partitions._statistics, df, cols_num)
+        for i, feature in enumerate(df.columns):
+            facts = dict(nulls=int(sum(nulls[i] for nulls, _, _ in results)))
+            if feature in cols_num:
+                facts['is_int'] = all(is_int[feature] for _, is_int, _ in results)
+            else:
+                facts['nunique'] = pd.concat([uniques[feature] for _, _, uniques in results], ignore_index=True).nunique()
+            self.profile.update(feature, **facts)
+
+    def _statistics(self, df, cols_num):
+        # function that computes the statistics of a partition, the unique values are merged instead of their counts
+        nulls = df.isna().sum().to_numpy()
+        is_int = {feature: ColumnProfile._is_int(df[feature]) for feature in cols_num}
+        uniques = {feature: df[feature].drop_duplicates() for feature in df.columns if feature not in cols_num}
+        return nulls, is_int, uniques
+
+    def value_counts(self, df, features):
+        # function that counts the known values of the features per partition, the merged counts keep the order in which the values first appear
+        results = Partitions.map(self, Partitions._value_counts, df, features)
+        return {feature: pd.concat([counts[feature] for counts in results]).groupby(level=0, sort=False).sum() for feature in features}
+
+    def _value_counts(self, df, features):
+        # function that counts the known values of the features of a partition
+        return {feature: df[feature].value_counts(sort=False) for feature in features}
+
+    def sketches(self, function, df, features):
+        # function that builds the quantile sketches of the features per partition with function(worker, partition, features), and merges them
+        results = Partitions.map(self, function, df, features)
+        sketches = results[0]
+        for result in results[1:]:
+            for feature in features:
+                sketches[feature].merge(result[feature])
+        return sketches
+
+    def apply(self, apply, df, state, is_int=False):
+        # function that applies a step to every partition in parallel, the step may only change or add features of each observation on its own
+        # with 'is_int' the INT checks of the full data are passed to the workers, so that every partition rounds its features the same way
+        facts = {feature: dict(is_int=self.profile.is_int(df, feature)) for feature in self.profile.numerical(df)} if is_int else None
+        bounds = Partitions.bounds(self, df)
+        results = Partitions.map(self, Partitions._apply, df, apply, state, facts=facts)
+        # the workers return the changed and added features, which are recorded in the report of the step
+        changed = []
+        for part, features in results:
+            for feature, record in features.items():
+                self.report.feature(feature, record['seconds'], record['cells_modified'])
+            changed += [x for x in part.columns if x not in changed]
+        for feature in changed:
+            original = df[feature] if feature in df.columns else None
+            parts = [part[feature] if feature in part.columns else original.iloc[start:stop] for (part, _), (start, stop) in zip(results, bounds)]
+            values = pd.concat(Partitions._align(self, original, parts))
+            values.index = df.index
+            if original is not None and values.dtype == object:
+                # missing values that were not imputed keep their original objects, as if the full data was changed in place
+                values = values.where(values.notna(), original)
+            df[feature] = values
+        self.profile.invalidate(changed)
+        return df
+
+    def _apply(self, df, apply, state):
+        # function that applies a step to a partition, and returns the changed and added features with the features recorded by the step
+        columns = list(df.columns)
+        df = self.report.run(apply, self, df, state)
+        features = self.report.stages[0]['features']
+        return df[[x for x in df.columns if x in features or x not in columns]], features
+
+    def _align(self, original, parts):
+        # function that converts a feature to the same type in all partitions, the type the full data would be converted to
+        # added features are converted by concatenating them, e.g. INT components of DATETIMEs to FLOATs if any partition has missing values
+        dtypes = set(str(x.dtype) for x in parts)
+        if original is None or len(dtypes) == 1:
+            return parts
+        if 'Int64' in dtypes and len(dtypes) == 2:
+            # features that are converted to INTs in some partitions only, e.g. after imputation, are INTs if all their values are INTs
+            values = pd.concat([x.astype(float) for x in parts])
+            dtype = 'Int64' if ColumnProfile._is_int(values) else [x for x in dtypes if x != 'Int64'][0]
+        else:
+            # otherwise the partitions where the step changed nothing get the type of the partitions where it did
+            changed = [x for x in dtypes if x != str(original.dtype)]
+            if len(changed) != 1:
+                return parts
+            dtype = changed[0]
+        return [x if str(x.dtype) == dtype else x.astype(dtype) for x in parts]
@@ -0,0 +1,80 @@
+# AutoClean 2022
+# For detailed documentation and usage guide, please visit the official GitHub Repo.
+# https://github.com/elisemercury/AutoClean
+
+from loguru import logger
+from AutoClean.modules import *
+
+'''
+The planner decides which stages of the AutoClean process run and in which order, and fuses the learned steps that pass over the same features.
+'''
+
+class Planner:
+
+    # imputation methods that fit a model per feature, and get faster when observations are deleted first
+    MODEL_METHODS = ['auto', 'linreg', 'logreg', 'knn']
+
+    def plan(self, df, input_data):
+        # function that returns the stages of the process as (function, args), in the order they run
+        # stages that cannot change the data are left out, the facts are taken from the column profile
+        cols_num = self.profile.numerical(df)
+        cols_categ = self.profile.categorical(df)
+        stages = [
+            (Duplicates.handle, (), 'handling of duplicates', self.duplicates, None),
+            # missing values are handled also if there are none, so that the imputers are fit for new data
+            (MissingValues.handle, (), 'handling of missing values', self.missing_num or self.missing_categ, None),
+            (Outliers.handle, (), 'handling of outliers', self.outliers,
+             'no NUMERICAL features found' if len(cols_num) == 0 else None),
+            (Adjust.convert_datetime, (), 'datetime feature conversion', self.extract_datetime,
+             'no CATEGORICAL features found' if len(cols_categ) == 0 else None),
+            (EncodeCateg.handle, (), 'encoding of categorical features', self.encode_categ,
+             'no CATEGORICAL features found' if len(cols_categ) == 0 and not Planner._by_column(self) else None),
+            # the features to convert are only known after the previous stages
+            (Adjust.round_values, (input_data,), 'feature type conversion',
+             self.duplicates or self.missing_num or self.missing_categ or self.outliers or self.encode_categ or self.extract_datetime, None),
+            (Adjust.downcast, (), 'downcasting of feature types', self.downcast, None),
+        ]
+        plan = []
+        for function, args, name, enabled, reason in stages:
+            if not enabled:
+                logger.info('Skipped {}', name)
+            elif reason is not None:
+                logger.info('Skipped {}, {}', name, reason)
+            else:
+                plan.append((function, args))
+
+        functions = [function for function, _ in plan]
+        if self.outliers in ['auto', 'winz'] and Outliers.handle in functions and Adjust.round_values in functions and not Planner._by_column(self):
+            # the outliers are clipped by the type conversion, which passes over every feature once,
+            # the stages in between only read and add CATEGORICAL features
+            plan[functions.index(Outliers.handle)] = (Outliers.handle, (True,))
+            plan[functions.index(Adjust.round_values)] = (Adjust.round_values, (input_data, True))
+
+        if self.reorder and self.outliers == 'delete' and (self.missing_num in Planner.MODEL_METHODS or self.missing_categ in Planner.MODEL_METHODS):
+            # observations containing outliers are deleted before the imputation models are fit
+            functions = [function for function, _ in plan]
+            if MissingValues.handle in functions and Outliers.handle in functions:
+                outliers = plan.pop(functions.index(Outliers.handle))
+                plan.insert(functions.index(MissingValues.handle), outliers)
+                logger.info('Reordered handling of outliers before handling of missing values')
+        return plan
+
+    def fuse(self, steps):
+        # function that fuses the clipping of outliers with the type conversion, so that transform passes over every feature once
+        functions = [apply for apply, _ in steps]
+        if Outliers._clip not in functions or Adjust._cast not in functions:
+            return steps
+        clip, cast = functions.index(Outliers._clip), functions.index(Adjust._cast)
+        bounds, dtypes = steps[clip][1], steps[cast][1]
+        # the steps in between may only add features, and must not read the clipped features
+        for apply, state in steps[clip+1:cast]:
+            if apply not in [Adjust._extract_datetime, EncodeCateg._encode] or any(x in bounds[0].index for x in state):
+                return steps
+        steps = list(steps)
+        steps[cast] = (Adjust._clip_cast, (bounds, dtypes))
+        del steps[clip]
+        return steps
+
+    def _by_column(self):
+        # whether the features to encode are selected by name or index, which may include NUMERICAL features
+        return isinstance(self.encode_categ, list) and len(self.encode_categ) == 2
@@ -0,0 +1,129 @@
+# AutoClean 2022
+# For detailed documentation and usage guide, please visit the official GitHub Repo.
+# https://github.com/elisemercury/AutoClean
+
+import os
+import cProfile
+import tracemalloc
+from timeit import default_timer as timer
+import pandas as pd
+
+'''
+The run report records what every stage of an AutoClean process did: wall time, peak memory, observations and modified cells.
+'''
+
+class RunReport:
+
+    def __init__(self, trace_memory=False, cprofile=False):
+        # 'trace_memory' measures the peak memory of every stage with tracemalloc, which slows down the process
+        # 'cprofile' is a directory where a cProfile dump of every stage is saved, e.g. for snakeviz or pstats
+        # the peak memory of a stage is counted on top of the memory in use when it starts, the peak memory of the process in total
+        self.trace_memory = trace_memory
+        self.cprofile = cprofile
+        self.stages = []
+        self.seconds = None
+        self.peak_memory = None
+        # 'hit' or 'miss' if the result cache is used
+        self.cache = None
+        # memory of the data in bytes before and after the types are downcast
+        self.bytes_before = None
+        self.bytes_after = None
+        self._current = None
+        self._profilers = dict()
+        self._tracing = False
+
+    def start(self):
+        # function that starts the report of a process, memory is traced from here on
+        self._start = timer()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        return self
+
+    def stop(self):
+        # function that completes the report of a process and saves the cProfile dumps
+        self.seconds = timer() - self._start
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+        for name, profiler in self._profilers.items():
+            os.makedirs(self.cprofile, exist_ok=True)
+            path = os.path.join(self.cprofile, name + '.prof')
+            profiler.dump_stats(path)
+            self._record(name)['profile'] = path
+        # profilers cannot be pickled together with the fitted cleaner
+        self._profilers = dict()
+        return self
+
+    def run(self, function, obj, df, *args):
+        # function that runs a stage as function(obj, df, *args) and records it under the name of the function
+        # stages that run several times, e.g. once per chunk, are added up in the same record
+        record = self._record(function.__qualname__)
+        rows_in, columns_in = df.shape
+        self._current = record
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            # the peak memory of a stage is measured on top of the memory in use when it starts
+            current = tracemalloc.get_traced_memory()[0]
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+        start = timer()
+        try:
+            if self.cprofile:
+                profiler = self._profilers.setdefault(function.__qualname__, cProfile.Profile())
+                df = profiler.runcall(function, obj, df, *args)
+            else:
+                df = function(obj, df, *args)
+        finally:
+            record['seconds'] += timer() - start
+            self._current = None
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                self.peak_memory = peak if self.peak_memory is None else max(self.peak_memory, peak)
+                peak -= current / 2 ** 20
+                record['peak_memory'] = peak if record['peak_memory'] is None else max(record['peak_memory'], peak)
+        record['runs'] += 1
+        record['rows_in'] += rows_in
+        record['rows_out'] += len(df)
+        record['columns_in'], record['columns_out'] = columns_in, df.shape[1]
+        return df
+
+    def feature(self, feature, seconds=None, cells=0, sample_size=None, quality=None):
+        # function that records the time spent on a feature and the number of its cells that were modified, e.g. imputed, winsorized or deleted
+        # imputation models also record the number of observations they were fit on, and the estimated quality of a sampled fit
+        # calls outside of a stage, e.g. while a streaming sample is imputed, are not recorded
+        if self._current is None:
+            return
+        record = self._current['features'].setdefault(feature, dict(seconds=None, cells_modified=0, sample_size=None, quality=None))
+        if seconds is not None:
+            record['seconds'] = seconds if record['seconds'] is None else record['seconds'] + seconds
+        record['cells_modified'] += int(cells)
+        self._current['cells_modified'] += int(cells)
+        if sample_size is not None:
+            record['sample_size'] = int(sample_size)
+        if quality is not None:
+            # the lowest estimate is kept if several models impute the feature, e.g. in 'auto' mode
+            record['quality'] = quality if record['quality'] is None else min(record['quality'], quality)
+
+    def to_dict(self):
+        # function that returns the report as a JSON serializable dict, e.g. for monitoring
+        return dict(seconds=self.seconds, peak_memory=self.peak_memory, cache=self.cache, bytes_before=self.bytes_before, bytes_after=self.bytes_after,
+                    stages=[dict(x, features={str(k): dict(v) for k, v in x['features'].items()}) for x in self.stages])
+
+    def to_frame(self, features=False):
+        # function that returns one row per stage, or one row per stage and feature if 'features' is set
+        if features:
+            rows = [dict(stage=x['stage'], feature=k, **v) for x in self.stages for k, v in x['features'].items()]
+            return pd.DataFrame(rows, columns=['stage', 'feature', 'seconds', 'cells_modified', 'sample_size', 'quality'])
+        columns = ['stage', 'runs', 'seconds', 'peak_memory', 'rows_in', 'rows_out', 'columns_in', 'columns_out', 'cells_modified', 'profile']
+        return pd.DataFrame([{k: x[k] for k in columns} for x in self.stages], columns=columns)
+
+    def _record(self, name):
+        # function that returns the record of a stage, and creates it on the first run of the stage
+        for record in self.stages:
+            if record['stage'] == name:
+                return record
+        record = dict(stage=name, runs=0, seconds=0.0, peak_memory=None, rows_in=0, rows_out=0, columns_in=None, columns_out=None,
+                      cells_modified=0, features=dict(), profile=None)
+        self.stages.append(record)
+        return record
@@ -0,0 +1,181 @@
+# AutoClean 2022
+# For detailed documentation and usage guide, please visit the official GitHub Repo.
+# https://github.com/elisemercury/AutoClean
+
+import numpy as np
+
+'''
+Sketches are bounded-memory summaries of the data used by the AutoClean pipeline.
+'''
+
+class QuantileSketch:
+
+    def __init__(self, error=0.01, seed=0):
+        # KLL quantile sketch, 'error' is the targeted rank error (e.g. 0.01 = 1% of the observations)
+        # memory is bounded by roughly 3*k values independent of the number of observations
+        self.error = error
+        self.k = max(int(np.ceil(3.3 / error)), 8)
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        # function that adds a batch of values to the sketch, NaNs are ignored
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) != 0:
+            self.count += len(values)
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other):
+        # function that merges another sketch into this sketch
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        # function that returns the approximate quantile(s) q, with q in [0, 1]
+        q = np.asarray(q, dtype=float)
+        if self.count == 0:
+            return np.full(q.shape, np.nan)
+        if len(self.levels) == 1:
+            # nothing was compacted yet, the quantiles are exact
+            return np.percentile(self.levels[0], q * 100)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        values, weights = values[order], weights[order]
+        # interpolate between the rank centers of the weighted values
+        ranks = (np.cumsum(weights) - weights / 2) / weights.sum()
+        return np.interp(q, ranks, values)
+
+    def _capacity(self, level):
+        # lower levels get geometrically smaller capacities, as in the KLL sketch
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self):
+        # function that compacts full levels by promoting every other sorted value to the next level
+        while True:
+            for level, items in enumerate(self.levels):
+                if len(items) > self._capacity(level):
+                    break
+            else:
+                return
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(items)
+            odd = len(items) % 2
+            promoted = items[odd + self._rng.integers(2)::2]
+            self.levels[level] = items[:odd]
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+
+class HashSet:
+
+    def __init__(self):
+        # exact set of 64-bit row hashes, kept as a few sorted runs that take 8 bytes per hash
+        # runs are merged when the newer run grows to half the size of the older one, so that adding a batch costs about the size of the batch
+        self.count = 0
+        self._runs = []
+
+    @property
+    def hashes(self):
+        # sorted array of all hashes in the set
+        return np.sort(np.concatenate(self._runs)) if len(self._runs) > 1 else (self._runs[0] if self._runs else np.empty(0, dtype=np.uint64))
+
+    def contains(self, hashes):
+        # function that returns for each hash whether it was added before
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            pos = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            found |= run[pos] == hashes
+        return found
+
+    def update(self, hashes):
+        # function that adds a batch of hashes to the set
+        hashes = np.unique(np.asarray(hashes, dtype=np.uint64))
+        hashes = hashes[~self.contains(hashes)]
+        if len(hashes) != 0:
+            self._runs.append(hashes)
+            while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+                # the runs are disjoint, so merging them is a sort of their concatenation
+                last = self._runs.pop()
+                self._runs[-1] = np.sort(np.concatenate([self._runs[-1], last]))
+            self.count = sum(len(run) for run in self._runs)
+        return self
+
+    def merge(self, other):
+        # function that merges another set into this set
+        return self.update(other.hashes)
+
+
+class BloomFilter:
+
+    def __init__(self, error=0.001, capacity=1000000):
+        # scalable Bloom filter of 64-bit row hashes, 'error' is the targeted false-positive rate (e.g. 0.001 = 0.1% of the new hashes)
+        # a new slice with twice the capacity and half the error is added whenever the last slice is full, so the error stays below 'error'
+        # memory is roughly 1.44*log2(1/error) bits per hash instead of 64 bits for the exact set
+        self.error = error
+        self.capacity = capacity
+        self.count = 0
+        self.slices = []
+
+    def contains(self, hashes):
+        # function that returns for each hash whether it was probably added before, false positives occur with rate 'error'
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        found = np.zeros(len(hashes), dtype=bool)
+        for bits, k, capacity, count in self.slices:
+            idx = BloomFilter._positions(hashes, k, len(bits) * 8)
+            found |= ((bits[idx >> 3] >> (idx & 7).astype(np.uint8)) & 1).all(axis=0).astype(bool)
+        return found
+
+    def update(self, hashes):
+        # function that adds a batch of hashes to the filter
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        while len(hashes) != 0:
+            if len(self.slices) == 0 or self.slices[-1][3] >= self.slices[-1][2]:
+                self._add_slice()
+            bits, k, capacity, count = self.slices[-1]
+            batch, hashes = hashes[:capacity - count], hashes[capacity - count:]
+            idx = BloomFilter._positions(batch, k, len(bits) * 8).ravel()
+            np.bitwise_or.at(bits, idx >> 3, np.left_shift(1, idx & 7).astype(np.uint8))
+            self.slices[-1][3] += len(batch)
+            self.count += len(batch)
+        return self
+
+    def merge(self, other):
+        # function that merges another filter with the same error and capacity into this filter
+        if (self.error, self.capacity) != (other.error, other.capacity):
+            raise ValueError('Only Bloom filters with the same error and capacity can be merged.')
+        for i, (bits, k, capacity, count) in enumerate(other.slices):
+            if i == len(self.slices):
+                self.slices.append([bits.copy(), k, capacity, count])
+            else:
+                np.bitwise_or(self.slices[i][0], bits, out=self.slices[i][0])
+                self.slices[i][3] += count
+        self.count += other.count
+        return self
+
+    def _add_slice(self):
+        # slice i holds capacity*2^i hashes with error*2^-(i+1), the errors of all slices sum up to less than 'error'
+        i = len(self.slices)
+        capacity = self.capacity * 2 ** i
+        error = self.error * 0.5 ** (i + 1)
+        size = int(np.ceil(-capacity * np.log(error) / np.log(2) ** 2 / 8))
+        k = max(int(np.ceil(-np.log2(error))), 1)
+        self.slices.append([np.zeros(size, dtype=np.uint8), k, capacity, 0])
+
+    @staticmethod
+    def _positions(hashes, k, size):
+        # k bit positions per hash through double hashing of the two 32-bit halves of the hash
+        low, high = hashes & np.uint64(0xFFFFFFFF), (hashes >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(k, dtype=np.uint64)[:, None]
+        return (low + steps * high) % np.uint64(size)
@@ -0,0 +1,406 @@
+# AutoClean 2022
+# For detailed documentation and usage guide, please visit the official GitHub Repo.
+# https://github.com/elisemercury/AutoClean
+
+import os
+from timeit import default_timer as timer
+import numpy as np
+import pandas as pd
+from loguru import logger
+from AutoClean.autoclean import AutoClean, FittedCleaner
+from AutoClean.modules import *
+from AutoClean.columns import ColumnProfile
+from AutoClean.report import RunReport
+from AutoClean.planner import Planner
+from AutoClean.sketches import QuantileSketch, HashSet
+
+class AutoCleanStream:
+
+    def __init__(self, input_path, output_path, chunksize=100000, mode='auto', duplicates=False, duplicates_subset=None, duplicates_store=False, missing_num=False, missing_categ=False, encode_categ=False, drop_encoded=False, unseen_label=-2, extract_datetime=False, outliers=False, outlier_param=1.5, quantile_sketch=0.01, n_neighbors=3, n_jobs=1, trace_memory=False, cprofile=False, logfile=True, verbose=False):
+        '''
+        input_path (str)................path of the CSV or Parquet (.parquet) file to clean
+        output_path (str)...............path of the CSV or Parquet (.parquet) file the cleaned data is written to
+        chunksize (int).................number of observations that are read, cleaned and written at once
+                                        the peak memory is bounded by the chunksize instead of the size of the file
+
+        all other parameters are the same as for AutoClean, with the following differences:
+        quantile_sketch (float).........targeted rank error of the quantile sketches, the exact quartiles are not available when streaming
+        sparse_onehot...................not available, the cleaned chunks are written as dense features
+        low_memory......................not available, the memory is bounded by the chunksize
+        sample_size.....................not available, the models are fit on the random sample of 'chunksize' observations
+        partitions......................not available, the chunks are cleaned one after the other
+        cache, cache_size...............not available, the cleaned file is the result
+        incremental, downcast...........not available
+        reorder.........................not available, the statistics of all steps are collected in a single pass
+        duplicates_store (str, float)...store used to find duplicates across chunks, False uses an exact store that is not kept in the fitted cleaner
+        outliers (str)..................'delete' always computes the bounds on the original data, as with outlier_bounds='original'
+        missing_num, missing_categ......model-based imputation ('auto', 'linreg', 'logreg' and 'knn') is fit on a random sample of 'chunksize' observations,
+                                        'mean', 'median' and 'most_frequent' use statistics of the full data
+
+        OUTPUT (str)....................the path of the cleaned file, accessible through the 'output' instance
+        FITTED (FittedCleaner)..........the learned parameters, accessible through the 'fitted' instance
+        REPORT (RunReport)..............the steps of the transform pass added up over all chunks, accessible through the 'report' instance
+        '''
+        start = timer()
+        AutoClean._initialize_logger(self, verbose, logfile)
+        self.report = RunReport(trace_memory, cprofile).start()
+
+        if mode == 'auto':
+            duplicates, missing_num, missing_categ, outliers, encode_categ, extract_datetime = 'auto', 'auto', 'auto', 'winz', ['auto'], 's'
+
+        self.mode = mode
+        self.duplicates = duplicates
+        self.duplicates_subset = duplicates_subset
+        self.duplicates_store = duplicates_store
+        self.missing_num = missing_num
+        self.missing_categ = missing_categ
+        self.outliers = outliers
+        self.encode_categ = encode_categ
+        self.sparse_onehot = False
+        self.low_memory = False
+        self.drop_encoded = drop_encoded
+        self.unseen_label = unseen_label
+        self.extract_datetime = extract_datetime
+        self.outlier_param = outlier_param
+        self.outlier_bounds = 'original'
+        self.quantile_sketch = quantile_sketch
+        self.n_neighbors = n_neighbors
+        self.n_jobs = n_jobs
+        self.partitions = 1
+        self.sample_size = False
+        self.cache = False
+        self.cache_size = 1024
+        self.reorder = False
+        self.incremental = False
+        self.downcast = False
+        self.trace_memory = trace_memory
+        self.cprofile = cprofile
+        self.chunksize = chunksize
+        # NUMERICAL features of the first chunk that have other values in later chunks
+        self._text = set()
+
+        # validate the input parameters on the first chunk
+        if not isinstance(chunksize, int) or chunksize < 1:
+            raise ValueError('Invalid value for "chunksize" parameter.')
+        if os.path.abspath(input_path) == os.path.abspath(output_path):
+            raise ValueError('Invalid value for "output_path" parameter.')
+        AutoClean._validate_params(self, next(self._read_chunks(input_path)), verbose, logfile)
+        if not self.quantile_sketch:
+            raise ValueError('Invalid value for "quantile_sketch" parameter.')
+
+        self.fitted = FittedCleaner(dict(mode=self.mode, duplicates=self.duplicates, duplicates_subset=self.duplicates_subset, duplicates_store=self.duplicates_store,
+                                         missing_num=self.missing_num, missing_categ=self.missing_categ,
+                                         outliers=self.outliers, encode_categ=self.encode_categ, sparse_onehot=self.sparse_onehot, drop_encoded=self.drop_encoded,
+                                         unseen_label=self.unseen_label, extract_datetime=self.extract_datetime, outlier_param=self.outlier_param, 
+                                         outlier_bounds=self.outlier_bounds, quantile_sketch=self.quantile_sketch,
+                                         n_neighbors=self.n_neighbors, n_jobs=self.n_jobs, partitions=self.partitions, sample_size=self.sample_size, reorder=self.reorder, incremental=self.incremental, downcast=self.downcast,
+                                         low_memory=self.low_memory, trace_memory=self.trace_memory, cprofile=self.cprofile, verbose=verbose))
+
+        # first pass collects the statistics, second pass writes the cleaned chunks
+        self._statistics_pass(input_path)
+        self._fit()
+        self._transform_pass(input_path, output_path)
+        self.output = output_path
+        self.report.stop()
+
+        end = timer()
+        logger.info('AutoClean process completed in {} seconds', round(end-start, 6))
+
+        if not verbose:
+            print('AutoClean process completed in', round(end-start, 6), 'seconds')
+        if logfile:
+            print('Logfile saved to:', os.path.abspath(AutoClean._logfile_path(logfile)))
+
+    def _read_chunks(self, path):
+        # generator that reads the input file in chunks of 'chunksize' observations
+        if path.endswith('.parquet'):
+            try:
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError('Reading Parquet files requires the "pyarrow" package.')
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=self.chunksize):
+                yield batch.to_pandas()
+        else:
+            for chunk in pd.read_csv(path, chunksize=self.chunksize):
+                yield chunk
+
+    def _prepare(self, chunk):
+        # function that aligns the dtypes of a chunk with the NUMERICAL and CATEGORICAL features of the statistics pass
+        chunk = chunk.reset_index(drop=True)
+        for feature in self._cols_num:
+            if not pd.api.types.is_numeric_dtype(chunk[feature]):
+                # only numbers read as strings are converted, features with other values are found by _text_features()
+                chunk[feature] = pd.to_numeric(chunk[feature])
+        for feature in self._text:
+            if pd.api.types.is_numeric_dtype(chunk[feature]):
+                chunk[feature] = chunk[feature].astype(object)
+        return chunk
+
+    def _text_features(self, chunk):
+        # function that returns the NUMERICAL features of the first chunk that have values in this chunk which are no numbers
+        text = set()
+        for feature in self._cols_num:
+            if not pd.api.types.is_numeric_dtype(chunk[feature]):
+                values = pd.to_numeric(chunk[feature], errors='coerce')
+                if values.isna().sum() > chunk[feature].isna().sum():
+                    text.add(feature)
+        return text
+
+    def _init_statistics(self, chunk):
+        # function that initializes the statistics from the features of the first chunk
+        profile = ColumnProfile()
+        self._columns = list(chunk.columns)
+        # features with values that are no numbers in any chunk are CATEGORICAL, even if the first chunk only has numbers or missing values
+        self._cols_num = [x for x in profile.numerical(chunk) if x not in self._text]
+        self._cols_categ = [x for x in chunk.columns if x not in self._cols_num]
+        # DATETIME features and their format are detected on a sample of the first chunk
+        self._datetimes = dict()
+        if self.extract_datetime:
+            for feature in [x for x in self._cols_categ if x not in self._text]:
+                if profile.is_datetime(chunk, feature):
+                    self._datetimes[feature] = profile.datetime_format(chunk, feature)
+        self._count_rows = 0
+        self._count_missing = pd.Series(0, index=chunk.columns)
+        self._duplicates = []
+        self._seen = Duplicates._store(self) if self.duplicates_store is not False else HashSet()
+        self._sketches = {feature: QuantileSketch(error=self.quantile_sketch) for feature in self._cols_num}
+        self._sums = dict.fromkeys(self._cols_num, 0.0)
+        self._counts = dict.fromkeys(self._cols_num, 0)
+        self._is_int = dict.fromkeys(self._cols_num, True)
+        self.decimals = dict.fromkeys(self._cols_num, None)
+        self._value_counts = {feature: pd.Series(dtype=float) for feature in self._cols_num} if self.missing_num == 'most_frequent' else dict()
+        # the values are only counted for the features that are encoded or imputed with their mode, to bound the memory
+        if self.missing_categ == 'most_frequent':
+            vocab = self._cols_categ
+        else:
+            vocab = self._encode_targets() if self.encode_categ else []
+        self._vocab = {feature: pd.Series(dtype=float) for feature in vocab}
+        # features with too many unique values for 'auto' encoding, whose values are no longer counted
+        self._too_many = set()
+        self._has_time = dict.fromkeys(self._datetimes, False)
+        self._sample, self._sample_keys = None, np.empty(0)
+        self._rng = np.random.default_rng(0)
+
+    def _statistics_pass(self, path):
+        # first pass over the data: duplicates, missing values, quantile sketches, vocabularies and decimals
+        logger.info('Started statistics pass... Chunksize: {}', self.chunksize)
+        start = timer()
+        for i, chunk in enumerate(self._read_chunks(path)):
+            if i == 0:
+                self._init_statistics(chunk)
+            text = self._text_features(chunk)
+            if len(text) != 0:
+                # the values would be lost as NaN, so the pass starts again with these features as CATEGORICAL
+                logger.warning('Feature(s) {} have values that are no numbers in chunk {}, restarted statistics pass with them as CATEGORICAL', sorted(map(str, text)), i)
+                self._text |= text
+                return self._statistics_pass(path)
+            chunk = self._prepare(chunk)
+            self.profile = ColumnProfile()
+            self._count_rows += len(chunk)
+            if self.duplicates:
+                # duplicates are marked by their row hashes, also across chunks
+                hashes = Duplicates._hash_rows(self, chunk, self.duplicates_subset)
+                is_dup = pd.Series(hashes).duplicated().to_numpy() | self._seen.contains(hashes)
+                self._seen.update(hashes[~is_dup])
+                self._duplicates.append(np.packbits(is_dup))
+                chunk = chunk[~is_dup]
+            self._count_missing = self._count_missing.add(chunk.isna().sum(), fill_value=0)
+            for feature in self._cols_num:
+                values = chunk[feature].to_numpy(dtype=float, na_value=np.nan)
+                observed = values[~np.isnan(values)]
+                self._sketches[feature].update(observed)
+                self._sums[feature] += observed.sum()
+                self._counts[feature] += len(observed)
+                self._is_int[feature] = self._is_int[feature] and bool((observed % 1 == 0).all())
+                dec = Adjust._decimals(self, chunk[feature])
+                if dec is not None and (self.decimals[feature] is None or dec > self.decimals[feature]):
+                    self.decimals[feature] = dec
+                if feature in self._value_counts:
+                    self._value_counts[feature] = self._value_counts[feature].add(chunk[feature].value_counts(), fill_value=0)
+            for feature in list(self._vocab):
+                self._vocab[feature] = self._vocab[feature].add(chunk[feature].value_counts(), fill_value=0)
+                if self._is_auto_encoding() and self.missing_categ != 'most_frequent' and EncodeCateg._auto_method(self, len(self._vocab[feature])) is None:
+                    # the feature will not be encoded, more values cannot change that
+                    del self._vocab[feature]
+                    self._too_many.add(feature)
+            for feature in self._datetimes:
+                parsed = Adjust._parse_datetime(self, chunk[feature], self._datetimes[feature])
+                self._has_time[feature] = self._has_time[feature] or bool(((parsed.dt.hour != 0) | (parsed.dt.minute != 0) | (parsed.dt.second != 0)).any())
+            if self.missing_num in ['auto', 'linreg', 'knn'] or self.missing_categ in ['auto', 'logreg', 'knn']:
+                self._update_sample(chunk)
+        end = timer()
+        logger.info('Completed statistics pass of {} observation(s) in {} seconds', self._count_rows, round(end-start, 6))
+
+    def _update_sample(self, chunk):
+        # function that keeps a uniform random sample of 'chunksize' observations, for fitting model-based imputation
+        keys = np.concatenate([self._sample_keys, self._rng.random(len(chunk))])
+        sample = pd.concat([self._sample, chunk], ignore_index=True)
+        if len(sample) > self.chunksize:
+            keep = np.sort(np.argpartition(keys, self.chunksize)[:self.chunksize])
+            sample, keys = sample.iloc[keep].reset_index(drop=True), keys[keep]
+        self._sample, self._sample_keys = sample, keys
+
+    def _fit(self):
+        # function that learns the parameters of the FittedCleaner from the collected statistics
+        steps = self.fitted.steps
+        self.count_missing = int(self._count_missing.sum())
+        if self.duplicates:
+            steps.append((Duplicates._drop, (self.duplicates_subset, self._seen if self.duplicates_store is not False else None)))
+        if self.missing_num or self.missing_categ:
+            steps.append((MissingValues._drop_empty, None))
+            if self.missing_num:
+                steps += self._fit_missing('num', self.missing_num)
+            if self.missing_categ:
+                steps += self._fit_missing('categ', self.missing_categ)
+        if self.outliers:
+            bounds = Outliers._sketch_bounds(self, self._sketches, self._cols_num)
+            steps.append((Outliers._clip if self.outliers in ['auto', 'winz'] else Outliers._drop, bounds))
+        datetimes = dict()
+        if self.extract_datetime:
+            components = [name for name, _ in Adjust.DATETIME_COMPONENTS[:Adjust.DATETIME_GRANULARITY[self.extract_datetime]]]
+            for feature, format in self._datetimes.items():
+                datetimes[feature] = (format, list(components))
+                # drop the time components if all times are 0
+                if set(['Hour', 'Minute', 'Sec']) <= set(components) and not self._has_time[feature]:
+                    datetimes[feature] = (format, [x for x in components if x not in ['Hour', 'Minute', 'Sec']])
+            steps.append((Adjust._extract_datetime, datetimes))
+        encodings = dict()
+        if self.encode_categ:
+            encodings = self._fit_encodings()
+            steps.append((EncodeCateg._encode, encodings))
+        if self.duplicates or self.missing_num or self.missing_categ or self.outliers or self.encode_categ or self.extract_datetime:
+            dtypes = dict()
+            for feature in self._cols_num:
+                dtypes[feature] = ('INT', None) if self._is_int[feature] else ('FLOAT', self.decimals[feature])
+            for feature, (format, components) in datetimes.items():
+                for name in components:
+                    dtypes[str(feature) + '_' + name] = ('INT', None)
+            for feature, (method, _) in encodings.items():
+                if method == 'LABEL':
+                    dtypes[str(feature) + '_lab'] = ('INT', None)
+            steps.append((Adjust._cast, dtypes))
+        # the clipping of outliers and the type conversion pass over each chunk once
+        self.fitted.steps = Planner.fuse(self, steps)
+
+    def _fit_missing(self, type, method):
+        # function that learns the imputation of NUMERICAL or CATEGORICAL missing values
+        if method == 'delete':
+            steps = [(MissingValues._delete, type)]
+        elif method in ['mean', 'median', 'most_frequent']:
+            steps = [(MissingValues._fill, (method.upper(), self._constant_imputers(type, method)))]
+        else:
+            # model-based imputation is fit on the random sample
+            params = {k: v for k, v in self.fitted.__dict__.items() if k != 'steps'}
+            params.update(missing_num=method if type == 'num' else False, missing_categ=method if type == 'categ' else False)
+            if self._sample is None:
+                return []
+            sample_cleaner = FittedCleaner(params)
+            sample_cleaner.fitted = sample_cleaner
+            sample_cleaner.profile = ColumnProfile()
+            self._sample = MissingValues.handle(sample_cleaner, self._sample)
+            return [step for step in sample_cleaner.steps if step[0] is not MissingValues._drop_empty]
+        # impute the sample as well, so that later model-based imputation is fit on imputed data
+        if self._sample is not None:
+            self.fitted.profile = ColumnProfile()
+            for apply, state in steps:
+                self._sample = apply(self.fitted, self._sample, state)
+        return steps
+
+    def _constant_imputers(self, type, method):
+        # function that builds imputers filling the mean, median or mode computed on the full data
+        from sklearn.impute import SimpleImputer
+        imputers = dict()
+        if type == 'num':
+            for feature in self._cols_num:
+                if self._counts[feature] == 0:
+                    continue
+                if method == 'mean':
+                    value = self._sums[feature] / self._counts[feature]
+                elif method == 'median':
+                    value = float(self._sketches[feature].quantile(0.5))
+                else:
+                    counts = self._value_counts[feature]
+                    value = counts[counts == counts.max()].index.min()
+                imputers[feature] = (None, SimpleImputer(strategy='constant', fill_value=value).fit([[value]]))
+        else:
+            for feature in self._vocab:
+                counts = self._vocab[feature]
+                if len(counts) == 0:
+                    continue
+                mapping = {k: i for i, k in enumerate(counts.index)}
+                code = mapping[EncodeCateg._sorted(self, counts[counts == counts.max()].index)[0]]
+                imputers[feature] = (mapping, SimpleImputer(strategy='constant', fill_value=code).fit([[code]]))
+        return imputers
+
+    def _encode_targets(self):
+        # function that returns the CATEGORICAL features to encode
+        encode_categ = self.encode_categ if isinstance(self.encode_categ, list) else ['auto']
+        cols_categ = [x for x in self._cols_categ if x not in self._datetimes]
+        if len(encode_categ) == 1:
+            return cols_categ # encode ALL columns
+        # encode only specific columns, given as names or indexes
+        target_cols = [x if x in self._columns else self._columns[x] for x in encode_categ[1]]
+        return [x for x in target_cols if x in cols_categ]
+
+    def _is_auto_encoding(self):
+        # whether the encoding method is chosen per feature from its number of unique values
+        encode_categ = self.encode_categ if isinstance(self.encode_categ, list) else ['auto']
+        return bool(self.encode_categ) and encode_categ[0] == 'auto'
+
+    def _fit_encodings(self):
+        # function that learns the categorical encodings from the vocabularies of the full data
+        encode_categ = self.encode_categ if isinstance(self.encode_categ, list) else ['auto']
+        encodings = dict()
+        for feature in self._encode_targets():
+            if feature in self._too_many:
+                continue
+            categories = EncodeCateg._sorted(self, self._vocab[feature].index)
+            method = encode_categ[0].upper() if encode_categ[0] != 'auto' else EncodeCateg._auto_method(self, len(categories))
+            if method:
+                encodings[feature] = (method, categories)
+        return encodings
+
+    def _transform_pass(self, input_path, output_path):
+        # second pass over the data: cleans each chunk and writes it to the output file
+        logger.info('Started transform pass...')
+        start = timer()
+        writer = None
+        self.count_rows = 0
+        # the steps of all chunks are recorded in the report of the stream
+        self.fitted.report = self.report
+        try:
+            for i, chunk in enumerate(self._read_chunks(input_path)):
+                chunk = self._prepare(chunk)
+                if self.duplicates:
+                    is_dup = np.unpackbits(self._duplicates[i], count=len(chunk)).astype(bool)
+                    chunk = chunk[~is_dup].reset_index(drop=True)
+                self.fitted.profile = ColumnProfile()
+                for apply, state in self.fitted.steps:
+                    # duplicates were already removed across all chunks
+                    if apply is not Duplicates._drop:
+                        chunk = self.report.run(apply, self.fitted, chunk, state)
+                writer = self._write_chunk(chunk, output_path, writer)
+                self.count_rows += len(chunk)
+        finally:
+            if writer is not None and writer is not True:
+                writer.close()
+        end = timer()
+        logger.info('Completed transform pass of {} observation(s) in {} seconds', self.count_rows, round(end-start, 6))
+
+    def _write_chunk(self, chunk, path, writer):
+        # function that appends a cleaned chunk to the output file
+        if path.endswith('.parquet'):
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError('Writing Parquet files requires the "pyarrow" package.')
+            if writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer = pq.ParquetWriter(path, table.schema)
+            else:
+                table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+            writer.write_table(table)
+            return writer
+        chunk.to_csv(path, mode='a' if writer else 'w', header=writer is None, index=False)
+        return True
@@ -0,0 +1,165 @@
+# AutoClean 2022
+# For detailed documentation and usage guide, please visit the official GitHub Repo.
+# https://github.com/elisemercury/AutoClean
+
+import io
+import os
+import sys
+import json
+import contextlib
+import inspect
+import argparse
+import platform
+import subprocess
+import tracemalloc
+from datetime import datetime
+from timeit import default_timer as timer
+
+'''
+Benchmarks the stages of the AutoClean pipeline and the full AutoClean process on synthetic data.
+
+    python benchmarks/bench.py --rows 10000 100000 1000000 --output results.json
+    python benchmarks/bench.py --repo /path/to/other/checkout --output other.json
+    python benchmarks/compare.py other.json results.json
+'''
+
+# stage name: (module, function, parameters of the AutoClean process)
+STAGES = {
+    'duplicates': ('Duplicates', 'handle', dict(duplicates='auto')),
+    'missing_auto': ('MissingValues', 'handle', dict(missing_num='auto', missing_categ='auto')),
+    'missing_mean': ('MissingValues', 'handle', dict(missing_num='mean', missing_categ='most_frequent')),
+    'missing_knn': ('MissingValues', 'handle', dict(missing_num='knn', missing_categ='knn')),
+    'outliers_winz': ('Outliers', 'handle', dict(outliers='winz')),
+    'outliers_delete': ('Outliers', 'handle', dict(outliers='delete')),
+    'convert_datetime': ('Adjust', 'convert_datetime', dict(extract_datetime='s')),
+    'encode_categ': ('EncodeCateg', 'handle', dict(encode_categ=['auto'])),
+    'encode_label': ('EncodeCateg', 'handle', dict(encode_categ=['label'])),
+    # round_values is skipped when no other stage is enabled, the outliers are not handled by the stage itself
+    'round_values': ('Adjust', 'round_values', dict(outliers='winz')),
+    'autoclean': (None, None, dict(mode='auto')),
+    'autoclean_low_memory': (None, None, dict(mode='auto', low_memory=True)),
+}
+
+def _import_autoclean(repo):
+    # function that imports AutoClean from the given checkout, to compare two commits of the repository
+    sys.path.insert(0, os.path.abspath(repo))
+    from AutoClean import autoclean, modules
+    from loguru import logger
+    logger.remove()
+    return autoclean, modules
+
+def _stage_instance(autoclean, params):
+    # function that builds the AutoClean instance a module expects as 'self', with the default parameters of the checkout
+    defaults = {name: p.default for name, p in inspect.signature(autoclean.AutoClean.__init__).parameters.items()
+                if p.default is not inspect.Parameter.empty}
+    defaults.update(mode='manual', logfile=False, verbose=False)
+    defaults.update(params)
+    instance = autoclean.AutoClean.__new__(autoclean.AutoClean)
+    instance.__dict__.update(defaults)
+    instance.decimals = dict()
+    if hasattr(autoclean, 'FittedCleaner'):
+        instance.fitted = autoclean.FittedCleaner(dict(defaults))
+    if hasattr(autoclean, 'ColumnProfile'):
+        instance.profile = autoclean.ColumnProfile()
+    if hasattr(autoclean, 'RunReport'):
+        instance.report = autoclean.RunReport()
+    return instance
+
+def _prepare(stage, df):
+    # function that returns the data a stage runs on, stages that change their input get a copy that is made before the measurement
+    module, function, params = STAGES[stage]
+    if module is None and not params.get('low_memory'):
+        # AutoClean copies the data itself
+        return df
+    return df.copy()
+
+def _run_stage(autoclean, modules, stage, df, data):
+    # function that runs a single stage, or the full AutoClean process, on the prepared data
+    module, function, params = STAGES[stage]
+    if module is None:
+        start = timer()
+        with contextlib.redirect_stdout(io.StringIO()):
+            autoclean.AutoClean(data, logfile=False, verbose=False, **params)
+        return timer() - start
+    instance = _stage_instance(autoclean, params)
+    start = timer()
+    if function == 'round_values':
+        getattr(getattr(modules, module), function)(instance, data, df)
+    else:
+        getattr(getattr(modules, module), function)(instance, data)
+    return timer() - start
+
+def _measure(autoclean, modules, stage, df, repeat, memory):
+    # function that returns the wall times of all repetitions and the peak memory of one more run
+    times = []
+    for _ in range(repeat):
+        data = _prepare(stage, df)
+        times.append(_run_stage(autoclean, modules, stage, df, data))
+        del data
+    peak = None
+    if memory:
+        # tracemalloc slows down the stage, so the memory is measured in a separate run
+        data = _prepare(stage, df)
+        tracemalloc.start()
+        _run_stage(autoclean, modules, stage, df, data)
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return times, peak
+
+def _commit(repo):
+    # function that returns the commit of the benchmarked checkout, if it is a git repository
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=repo, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks the stages of the AutoClean pipeline on synthetic data.')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000], help='number of observations, e.g. 10000 100000 1000000 10000000')
+    parser.add_argument('--stages', nargs='+', default=list(STAGES), choices=list(STAGES), help='stages to benchmark')
+    parser.add_argument('--num', type=int, default=6, help='number of NUMERICAL features')
+    parser.add_argument('--categ', type=int, default=3, help='number of CATEGORICAL features')
+    parser.add_argument('--datetime', type=int, default=1, help='number of DATETIME features')
+    parser.add_argument('--missing', type=float, default=0.05, help='share of missing values')
+    parser.add_argument('--outliers', type=float, default=0.01, help='share of outliers')
+    parser.add_argument('--cardinality', type=int, default=20, help='number of categories of the CATEGORICAL features')
+    parser.add_argument('--duplicates', type=float, default=0.01, help='share of duplicated observations')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the data generator')
+    parser.add_argument('--repeat', type=int, default=3, help='number of timed runs per stage, the best run is reported')
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='skip the peak memory measurement')
+    parser.add_argument('--repo', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'), help='checkout of AutoClean to benchmark')
+    parser.add_argument('--output', default=None, help='path of the JSON results file')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from generate import make_data
+    autoclean, modules = _import_autoclean(args.repo)
+    import numpy, pandas, sklearn
+
+    data_params = dict(num=args.num, categ=args.categ, datetime=args.datetime, missing=args.missing, outliers=args.outliers,
+                       cardinality=args.cardinality, duplicates=args.duplicates, seed=args.seed)
+    results = dict(meta=dict(commit=_commit(args.repo), date=datetime.now().isoformat(timespec='seconds'), python=platform.python_version(),
+                             platform=platform.platform(), pandas=pandas.__version__, numpy=numpy.__version__, sklearn=sklearn.__version__,
+                             data=data_params, repeat=args.repeat),
+                   results=[])
+    # stages with parameters the checkout does not know yet are skipped
+    accepted = inspect.signature(autoclean.AutoClean.__init__).parameters
+    stages = [x for x in args.stages if all(k in accepted for k in STAGES[x][2])]
+    for stage in args.stages:
+        if stage not in stages:
+            print('Skipped stage "{}", which is not supported by the checkout'.format(stage))
+    for rows in args.rows:
+        df = make_data(rows=rows, **data_params)
+        for stage in stages:
+            times, peak = _measure(autoclean, modules, stage, df, args.repeat, args.memory)
+            results['results'].append(dict(stage=stage, rows=rows, seconds=min(times), times=times, peak_mb=peak))
+            print('{:<22} {:>10} rows  {:>10.4f} s  {:>10} MB'.format(stage, rows, min(times), 'n/a' if peak is None else round(peak, 1)), flush=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print('Results saved to:', os.path.abspath(args.output))
+    return results
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+# AutoClean 2022
+# For detailed documentation and usage guide, please visit the official GitHub Repo.
+# https://github.com/elisemercury/AutoClean
+
+import sys
+import json
+import argparse
+
+'''
+Compares two benchmark results files, e.g. of two commits, and reports the stages that got slower.
+
+    python benchmarks/compare.py base.json new.json --threshold 0.1
+'''
+
+def compare(base, new, threshold=0.1):
+    # function that returns one row per stage and scale found in both results, and whether any stage regressed
+    base = {(r['stage'], r['rows']): r for r in base['results']}
+    rows, regressed = [], False
+    for result in new['results']:
+        key = (result['stage'], result['rows'])
+        if key not in base:
+            continue
+        ratio = result['seconds'] / base[key]['seconds'] if base[key]['seconds'] > 0 else float('inf')
+        slower = ratio > 1 + threshold
+        regressed = regressed or slower
+        rows.append((key[0], key[1], base[key]['seconds'], result['seconds'], ratio, base[key].get('peak_mb'), result.get('peak_mb'), slower))
+    return rows, regressed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compares two AutoClean benchmark results files.')
+    parser.add_argument('base', help='results of the baseline, e.g. the main branch')
+    parser.add_argument('new', help='results to compare with the baseline')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative slowdown that is reported as regression, e.g. 0.1 = 10%%')
+    args = parser.parse_args(argv)
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    rows, regressed = compare(base, new, args.threshold)
+
+    print('base: {}   new: {}'.format(base['meta'].get('commit'), new['meta'].get('commit')))
+    print('{:<22} {:>10} {:>10} {:>10} {:>8} {:>10} {:>10}'.format('stage', 'rows', 'base s', 'new s', 'ratio', 'base MB', 'new MB'))
+    for stage, n, t_base, t_new, ratio, m_base, m_new, slower in rows:
+        print('{:<22} {:>10} {:>10.4f} {:>10.4f} {:>7.2f}x {:>10} {:>10}{}'.format(stage, n, t_base, t_new, ratio,
+              'n/a' if m_base is None else round(m_base, 1), 'n/a' if m_new is None else round(m_new, 1), '  SLOWER' if slower else ''))
+    # the exit code lets CI jobs fail on regressions
+    return 1 if regressed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+# AutoClean 2022
+# For detailed documentation and usage guide, please visit the official GitHub Repo.
+# https://github.com/elisemercury/AutoClean
+
+import numpy as np
+import pandas as pd
+
+'''
+Seeded generator of synthetic datasets for the AutoClean benchmarks.
+'''
+
+def make_data(rows=10000, num=6, categ=3, datetime=1, missing=0.05, outliers=0.01, cardinality=20, duplicates=0.01, seed=0):
+    '''
+    rows (int)..........................number of observations, including the duplicates
+    num (int)...........................number of NUMERICAL features, every other feature is INTEGER and the others are FLOATs with 2 decimals
+    categ (int).........................number of CATEGORICAL features
+    datetime (int)......................number of DATETIME features, stored as strings in the format '%Y-%m-%d %H:%M:%S'
+    missing (float).....................share of missing values in every FLOAT, CATEGORICAL and DATETIME feature
+    outliers (float)....................share of outliers in every NUMERICAL feature, drawn 20 standard deviations away from the mean
+    cardinality (int)...................number of categories of every CATEGORICAL feature
+    duplicates (float)..................share of observations that are copies of other observations
+    seed (int)..........................seed of the random generator, the same arguments always return the same data
+
+    OUTPUT (dataframe)..................a Pandas dataframe
+    '''
+    rng = np.random.default_rng(seed)
+    n = rows - int(rows * duplicates)
+    data = dict()
+    for i in range(num):
+        if i % 2 == 0:
+            values = rng.integers(0, 1000, n).astype(float)
+        else:
+            values = rng.normal(50, 10, n).round(2)
+        mask = rng.random(n) < outliers
+        values[mask] = values.mean() + np.where(rng.random(mask.sum()) < 0.5, -20, 20) * values.std()
+        data['num_' + str(i)] = values
+    labels = np.array(['cat_' + str(k) for k in range(cardinality)], dtype=object)
+    for i in range(categ):
+        data['categ_' + str(i)] = labels[rng.integers(0, cardinality, n)]
+    # the dates are formatted once for a pool of values, formatting millions of dates is slower than the benchmarked stages
+    pool = pd.date_range('2020-01-01', periods=min(n, 100000), freq='17min').strftime('%Y-%m-%d %H:%M:%S').to_numpy(dtype=object)
+    for i in range(datetime):
+        data['date_' + str(i)] = pool[rng.integers(0, len(pool), n)]
+    df = pd.DataFrame(data)
+
+    for feature in df.columns:
+        if feature.startswith('num_') and int(feature[4:]) % 2 == 0:
+            # INTEGER features have no missing values, so that they keep their dtype
+            df[feature] = df[feature].astype(int)
+            continue
+        mask = rng.random(n) < missing
+        df.loc[mask, feature] = np.nan
+
+    if rows > n:
+        df = pd.concat([df, df.iloc[rng.integers(0, n, rows - n)]], ignore_index=True)
+    return df
@@ -0,0 +1,76 @@
+# AutoClean 2022
+# For detailed documentation and usage guide, please visit the official GitHub Repo.
+# https://github.com/elisemercury/AutoClean
+
+import os
+import sys
+import json
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+
+'''
+Measures the cold-start cost of importing AutoClean, each import runs in a new Python process.
+
+    python benchmarks/import_time.py --output import.json --max 1.0
+    python benchmarks/compare.py base_import.json import.json
+'''
+
+# modules that are only needed by some stages, and should not be loaded by the import of AutoClean
+LAZY_MODULES = ['sklearn', 'scipy', 'joblib']
+
+SCRIPT = '''
+import sys, json
+from timeit import default_timer as timer
+sys.path.insert(0, {repo!r})
+start = timer()
+import {module}
+seconds = timer() - start
+print(json.dumps(dict(seconds=seconds, loaded=[m for m in {lazy!r} if m in sys.modules])))
+'''
+
+def _measure(repo, module, repeat):
+    # function that imports the module in 'repeat' new processes and returns the import times and the lazy modules that were loaded
+    times, loaded = [], set()
+    for _ in range(repeat):
+        script = SCRIPT.format(repo=os.path.abspath(repo), module=module, lazy=LAZY_MODULES)
+        result = json.loads(subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout)
+        times.append(result['seconds'])
+        loaded.update(result['loaded'])
+    return times, sorted(loaded)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measures the time it takes to import AutoClean in a new Python process.')
+    parser.add_argument('--repeat', type=int, default=5, help='number of imports, the median is reported')
+    parser.add_argument('--max', type=float, default=None, help='maximum import time of AutoClean in seconds, the exit code is 1 if it is exceeded')
+    parser.add_argument('--repo', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'), help='checkout of AutoClean to benchmark')
+    parser.add_argument('--output', default=None, help='path of the JSON results file')
+    args = parser.parse_args(argv)
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=args.repo, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        commit = None
+    results = dict(meta=dict(commit=commit, date=datetime.now().isoformat(timespec='seconds'), python=platform.python_version(),
+                             platform=platform.platform(), repeat=args.repeat),
+                   results=[])
+    # pandas is always needed, its import time is the lower bound for the import of AutoClean
+    for stage, module in [('import_pandas', 'pandas'), ('import_autoclean', 'AutoClean.autoclean')]:
+        times, loaded = _measure(args.repo, module, args.repeat)
+        seconds = statistics.median(times)
+        results['results'].append(dict(stage=stage, rows=0, seconds=seconds, times=times, peak_mb=None, loaded=loaded))
+        print('{:<22} {:>10.4f} s  loaded: {}'.format(stage, seconds, ', '.join(loaded) if loaded else '-'), flush=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print('Results saved to:', os.path.abspath(args.output))
+    if args.max is not None and results['results'][-1]['seconds'] > args.max:
+        print('Import of AutoClean took longer than {} seconds'.format(args.max))
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
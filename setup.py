@@ -1,15 +1,20 @@
 from setuptools import setup
 import os
+import re
 
 base_dir = os.path.dirname(__file__)
 
 with open(os.path.join(base_dir, "README.md")) as f:
     long_description = f.read()
 
+# the version is defined once, in AutoClean/__init__.py
+with open(os.path.join(base_dir, "AutoClean", "__init__.py")) as f:
+    version = re.search(r"^__version__ = '([^']+)'", f.read(), re.M).group(1)
+
 setup(
   name = 'py-AutoClean',         
   packages = ['AutoClean'],   
-  version =  'v1.1.3',      
+  version = version,      
   license='MIT',        
   description = 'AutoClean - Python Package for Automated Preprocessing & Cleaning of Datasets', 
   long_description=long_description,
@@ -17,8 +22,11 @@ setup(
   author = 'Elise Landman',                  
   author_email = 'elisejlandman@hotmail.com', 
   url = 'https://github.com/elisemercury/AutoClean', 
-  download_url = 'https://github.com/elisemercury/AutoClean/archive/refs/tags/v1.1.3.tar.gz',
+  download_url = 'https://github.com/elisemercury/AutoClean/archive/refs/tags/v' + version + '.tar.gz',
   keywords = ['automated', 'cleaning', 'preprocessing', "autoclean"],  
+  entry_points={
+          'console_scripts': ['autoclean=AutoClean.cli:main'],
+      },
   install_requires=[          
           'scikit-learn',
           'numpy',